@@ -1,6 +1,7 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from .models import Signature, Document
+from .models import Signature, Document, OutboundEmail, MemoryProfile, PageOperation
+from .search import search_documents
 
 @admin.register(Signature)
 class SignatureAdmin(ModelAdmin):
@@ -11,4 +12,33 @@ class SignatureAdmin(ModelAdmin):
 class DocumentAdmin(ModelAdmin):
     list_display = ["title", "owner", "status", "created_at"]
     list_filter = ["status"]
-    search_fields = ["title", "owner__username"]
\ No newline at end of file
+    search_fields = ["title", "owner__username"]
+    list_select_related = ["owner"]
+    # Evita el COUNT(*) de toda la tabla en cada página del listado
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Búsqueda de texto completo (título + contenido) en lugar de LIKE;
+        # "@usuario" sigue buscando por propietario.
+        if not search_term or search_term.startswith('@'):
+            return super().get_search_results(request, queryset, search_term.lstrip('@'))
+        return search_documents(queryset, search_term), False
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(ModelAdmin):
+    list_display = ["to_email", "status", "attempts", "next_attempt_at", "sent_at"]
+    list_filter = ["status"]
+    search_fields = ["to_email"]
+    readonly_fields = ["attempts", "locked_at", "last_error", "created_at", "sent_at"]
+
+@admin.register(MemoryProfile)
+class MemoryProfileAdmin(ModelAdmin):
+    list_display = ["operation", "document_id", "file_size", "page_count", "tracemalloc_peak", "peak_rss", "duration_ms", "created_at"]
+    list_filter = ["operation"]
+    date_hierarchy = "created_at"
+
+@admin.register(PageOperation)
+class PageOperationAdmin(ModelAdmin):
+    list_display = ["kind", "owner", "status", "created_at", "finished_at"]
+    list_filter = ["kind", "status"]
+    readonly_fields = ["params", "result_ids", "error", "created_at", "finished_at"]
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.models.signals import post_save
+        from .models import Document
+        from .search import sync_title
+
+        post_save.connect(sync_title, sender=Document, dispatch_uid='core_document_sync_title')
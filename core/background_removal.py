@@ -0,0 +1,141 @@
+"""
+Eliminación del fondo de las firmas con rembg.
+
+rembg arrastra onnxruntime, OpenCV y numpy (cientos de MB y varios
+segundos de importación). Se importa la primera vez que se procesa una
+firma y no al cargar core.views, para que los workers de gunicorn y los
+comandos de gestión (migrate, collectstatic...) arranquen sin cargarlos.
+
+El coste depende del perfil (settings.BACKGROUND_REMOVAL_PROFILES):
+- model: modelo de rembg ('u2net', 'u2netp', 'silueta'...) o None para
+  usar solo el umbral de luminancia, sin red neuronal;
+- max_side: la inferencia se hace sobre una copia reducida a este lado
+  máximo y la máscara se reescala al tamaño original, así que el coste ya
+  no depende de la resolución de la foto del móvil;
+- scan_threshold: si la imagen parece un escaneo limpio (papel claro y
+  uniforme, trazo oscuro) se usa el umbral aunque el perfil tenga modelo.
+"""
+import threading
+
+from django.conf import settings
+from PIL import Image
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+# Tamaño de la miniatura usada para decidir si una imagen es un escaneo limpio
+_PROBE_SIZE = 256
+
+
+def _get_session(model):
+    """Importa rembg y crea la sesión ONNX de cada modelo una sola vez por proceso."""
+    with _session_lock:
+        if model not in _sessions:
+            from rembg import new_session
+            _sessions[model] = new_session(model)
+        return _sessions[model]
+
+
+def get_profile(name=None):
+    """Devuelve el perfil indicado o el configurado en BACKGROUND_REMOVAL_PROFILE."""
+    name = name or settings.BACKGROUND_REMOVAL_PROFILE
+    try:
+        return settings.BACKGROUND_REMOVAL_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Perfil de eliminación de fondo desconocido: {name}")
+
+
+def _paper_and_ink_levels(gray):
+    """
+    Niveles de luminancia del papel (percentil 90) y de la tinta (percentil 0,2)
+    y fracción de píxeles en tonos intermedios, sobre una miniatura.
+    """
+    probe = gray.copy()
+    probe.thumbnail((_PROBE_SIZE, _PROBE_SIZE))
+    histogram = probe.histogram()
+    total = sum(histogram)
+
+    def percentile(fraction):
+        accumulated = 0
+        for level, count in enumerate(histogram):
+            accumulated += count
+            if accumulated >= total * fraction:
+                return level
+        return 255
+
+    paper = percentile(0.90)
+    ink = percentile(0.002)
+    midpoint_low = ink + (paper - ink) // 4
+    midpoint_high = paper - (paper - ink) // 4
+    midtones = sum(histogram[midpoint_low:midpoint_high]) / total
+    return paper, ink, midtones
+
+
+def looks_like_clean_scan(image):
+    """
+    True si la imagen tiene un fondo claro y uniforme con trazo bien contrastado,
+    como un escaneo o una foto hecha sobre papel blanco con buena luz.
+    """
+    paper, ink, midtones = _paper_and_ink_levels(image.convert('L'))
+    return paper >= 180 and paper - ink >= 80 and midtones <= 0.03
+
+
+def _threshold_mask(gray):
+    """
+    Máscara alfa por umbral: el papel queda transparente, la tinta opaca y
+    los bordes del trazo con una rampa lineal para no dentarlos.
+    """
+    paper, ink, _ = _paper_and_ink_levels(gray)
+    # Todo lo que esté cerca del nivel del papel es fondo
+    transparent_from = paper - max((paper - ink) // 5, 10)
+    opaque_to = ink + (paper - ink) // 3
+    span = max(transparent_from - opaque_to, 1)
+
+    table = []
+    for level in range(256):
+        if level >= transparent_from:
+            table.append(0)
+        elif level <= opaque_to:
+            table.append(255)
+        else:
+            table.append(255 * (transparent_from - level) // span)
+    return gray.point(table)
+
+
+def _model_mask(image, model, max_side):
+    """Máscara de rembg calculada sobre una copia reducida y reescalada al original."""
+    from rembg import remove
+
+    small = image
+    if max_side and max(image.size) > max_side:
+        small = image.copy()
+        small.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    mask = remove(small, session=_get_session(model), only_mask=True)
+    if mask.size != image.size:
+        mask = mask.resize(image.size, Image.Resampling.BILINEAR)
+    return mask
+
+
+def remove_background(image, profile=None):
+    """
+    Quita el fondo de una imagen PIL y devuelve la imagen RGBA resultante.
+
+    Args:
+        image: Imagen PIL de la firma (foto o escaneo).
+        profile (str): Nombre del perfil; por defecto BACKGROUND_REMOVAL_PROFILE.
+
+    Returns:
+        Image: Imagen RGBA del mismo tamaño que la original.
+    """
+    options = get_profile(profile)
+    image = image.convert('RGB')
+
+    model = options.get('model')
+    if model is None or (options.get('scan_threshold') and looks_like_clean_scan(image)):
+        mask = _threshold_mask(image.convert('L'))
+    else:
+        mask = _model_mask(image, model, options.get('max_side'))
+
+    image.putalpha(mask)
+    return image
@@ -0,0 +1,180 @@
+"""
+Subida masiva de PDFs (varios archivos o un ZIP).
+
+Los PDFs se validan y se escriben en el storage en paralelo con un pool
+de hilos acotado, y las filas Document se crean con un solo bulk_create.
+El ZIP no se descomprime a disco: cada entrada se lee del archivo subido
+solo cuando le toca procesarse, así que en memoria hay como máximo
+BATCH_UPLOAD_WORKERS * 2 PDFs a la vez.
+"""
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import fitz
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .models import Document
+from .search import index_document
+from .tasks import normalize_document, run_in_background
+
+logger = logging.getLogger('core')
+
+
+class BatchUploadError(Exception):
+    """El lote completo no se puede procesar (ZIP inválido, demasiados archivos...)."""
+
+
+def _zip_entries(archive):
+    """Entradas de un ZIP que son archivos (sin directorios ni metadatos de macOS)."""
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if info.is_dir() or not name or info.filename.startswith('__MACOSX/'):
+            continue
+        yield name, info
+
+
+def _open_batch(uploaded_files):
+    """
+    Abre los ZIP del lote y comprueba BATCH_UPLOAD_MAX_FILES antes de escribir
+    nada en el storage: el índice de un ZIP ya da el número de entradas.
+
+    Returns:
+        list: (archivo subido, ZipFile o None) por cada archivo del lote.
+
+    Raises:
+        BatchUploadError: Si un ZIP no es válido o el lote tiene demasiados archivos.
+    """
+    batch = []
+    count = 0
+    for uploaded in uploaded_files:
+        archive = None
+        if uploaded.name.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(uploaded)
+            except zipfile.BadZipFile:
+                raise BatchUploadError(f"{uploaded.name} no es un ZIP válido.")
+            count += sum(1 for _ in _zip_entries(archive))
+        else:
+            count += 1
+        batch.append((uploaded, archive))
+    if count > settings.BATCH_UPLOAD_MAX_FILES:
+        raise BatchUploadError(f"El lote supera el máximo de {settings.BATCH_UPLOAD_MAX_FILES} archivos.")
+    return batch
+
+
+def _iter_sources(batch):
+    """
+    Genera (nombre, función que devuelve los bytes, error) para cada archivo
+    del lote, leyendo los ZIP entrada por entrada.
+    """
+    max_size = settings.BATCH_UPLOAD_MAX_FILE_SIZE
+    for uploaded, archive in batch:
+        if archive is not None:
+            for name, info in _zip_entries(archive):
+                if info.file_size > max_size:
+                    yield name, None, 'El archivo supera el tamaño máximo permitido.'
+                    continue
+                # Se limita la lectura al tamaño declarado (+1) por si el ZIP miente
+                yield name, (lambda a=archive, i=info: a.open(i).read(max_size + 1)), None
+        else:
+            if uploaded.size > max_size:
+                yield uploaded.name, None, 'El archivo supera el tamaño máximo permitido.'
+                continue
+            yield uploaded.name, (lambda u=uploaded: u.read()), None
+
+
+def validate_pdf(pdf_bytes):
+    """
+    Comprueba que el PDF se pueda abrir, no esté cifrado y tenga páginas.
+
+    Returns:
+        int: Número de páginas.
+
+    Raises:
+        ValueError: Con el motivo del rechazo.
+    """
+    if len(pdf_bytes) > settings.BATCH_UPLOAD_MAX_FILE_SIZE:
+        raise ValueError('El archivo supera el tamaño máximo permitido.')
+    try:
+        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    except Exception:
+        raise ValueError('El archivo no es un PDF válido o está dañado.')
+    try:
+        if pdf_doc.needs_pass or pdf_doc.is_encrypted:
+            raise ValueError('El PDF está protegido con contraseña.')
+        if pdf_doc.page_count == 0:
+            raise ValueError('El PDF no tiene páginas.')
+        return pdf_doc.page_count
+    finally:
+        pdf_doc.close()
+
+
+def _process_one(name, pdf_bytes):
+    """Valida el PDF y lo escribe en el storage. Se ejecuta en el pool."""
+    pages = validate_pdf(pdf_bytes)
+    field = Document._meta.get_field('original_file')
+    storage_name = field.generate_filename(None, name)
+    storage_name = field.storage.save(storage_name, ContentFile(pdf_bytes), max_length=field.max_length)
+    return storage_name, pages
+
+
+def process_batch(uploaded_files, owner):
+    """
+    Procesa el lote y crea los documentos válidos.
+
+    Returns:
+        list: Un dict por archivo con name, ok, message y pages.
+
+    Raises:
+        BatchUploadError: Si el lote no se puede procesar; no se habrá escrito nada.
+    """
+    report = []
+    pending_documents = []
+    sources = _iter_sources(_open_batch(uploaded_files))
+    workers = settings.BATCH_UPLOAD_WORKERS
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='firma-batch') as executor:
+        while True:
+            # Ventana acotada de archivos en vuelo para no cargar todo el lote en memoria
+            window = list(islice(sources, workers * 2))
+            if not window:
+                break
+
+            futures = []
+            for name, read, error in window:
+                if not name.lower().endswith('.pdf'):
+                    report.append({'name': name, 'ok': False, 'message': 'Solo se admiten archivos PDF.', 'pages': None})
+                    continue
+                if error:
+                    report.append({'name': name, 'ok': False, 'message': error, 'pages': None})
+                    continue
+                # La lectura del ZIP se hace en este hilo (ZipFile no es seguro entre hilos)
+                futures.append((name, executor.submit(_process_one, name, read())))
+
+            for name, future in futures:
+                try:
+                    storage_name, pages = future.result()
+                except ValueError as e:
+                    report.append({'name': name, 'ok': False, 'message': str(e), 'pages': None})
+                    continue
+                except Exception as e:
+                    logger.error(f"Error subiendo {name} en lote: {e}", exc_info=True)
+                    report.append({'name': name, 'ok': False, 'message': 'Error al guardar el archivo.', 'pages': None})
+                    continue
+
+                title = os.path.splitext(name)[0][:200]
+                pending_documents.append(Document(
+                    owner=owner, title=title, original_file=storage_name, status='uploaded',
+                ))
+                report.append({'name': name, 'ok': True, 'message': 'Subido correctamente.', 'pages': pages})
+
+    Document.objects.bulk_create(pending_documents, batch_size=200)
+    for document in pending_documents:
+        run_in_background(normalize_document, document.pk)
+        run_in_background(index_document, document.pk)
+    logger.info(f"Subida en lote de {owner.username}: {len(pending_documents)} de {len(report)} archivos creados")
+    return report
@@ -0,0 +1,150 @@
+"""
+Exportación de varios documentos firmados en un único ZIP.
+
+El ZIP se genera al vuelo mientras se envía (StreamingHttpResponse): no se
+construye ningún archivo ZIP temporal y los primeros bytes salen en cuanto
+se ha leído el primer documento. zipfile escribe en un flujo no seekable
+usando data descriptors, así que cada entrada se emite por bloques.
+
+Las lecturas del storage se adelantan en paralelo (EXPORT_PREFETCH
+documentos en vuelo) y cada una se vuelca a un SpooledTemporaryFile, de
+modo que la memoria queda acotada aunque los PDF sean grandes.
+"""
+import io
+import logging
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger('core')
+
+# Tamaño de bloque al copiar del storage y al escribir en el ZIP
+_CHUNK_SIZE = 256 * 1024
+# Por debajo de este tamaño la lectura adelantada se queda en memoria
+_SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Destino no seekable de zipfile: acumula lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _flush(buffer):
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def archive_names(documents):
+    """Nombre de cada documento dentro del ZIP, a partir del título y sin repetidos."""
+    used = set()
+    names = []
+    for document in documents:
+        base = get_valid_filename(document.title) or f"documento_{document.pk}"
+        name = f"{base}.pdf"
+        counter = 2
+        while name.lower() in used:
+            name = f"{base}_{counter}.pdf"
+            counter += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _fetch(field_file):
+    """Lee el archivo del storage a un temporal (en memoria si es pequeño)."""
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY, dir=settings.PDF_SPOOL_DIR)
+    try:
+        with field_file.open('rb') as source:
+            shutil.copyfileobj(source, spool, _CHUNK_SIZE)
+        spool.seek(0)
+        return spool
+    except Exception:
+        spool.close()
+        raise
+
+
+def stream_signed_zip(documents):
+    """
+    Genera los bytes de un ZIP con el archivo firmado de cada documento.
+
+    Si un archivo no se puede leer, el ZIP sigue adelante y al final se
+    añade ERRORES.txt con los documentos que faltan (las cabeceras HTTP ya
+    se enviaron y no se puede devolver un error).
+
+    Args:
+        documents (list): Documentos con signed_file, ya filtrados por propietario.
+
+    Yields:
+        bytes: Fragmentos del ZIP.
+    """
+    buffer = _StreamBuffer()
+    errors = []
+    entries = iter(zip(archive_names(documents), documents))
+    prefetch = max(settings.EXPORT_PREFETCH, 1)
+
+    with ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='firma-export') as executor:
+        pending = deque()
+
+        def schedule():
+            for name, document in entries:
+                pending.append((name, document, executor.submit(_fetch, document.signed_file)))
+                if len(pending) >= prefetch:
+                    break
+
+        try:
+            with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                schedule()
+                while pending:
+                    name, document, future = pending.popleft()
+                    schedule()
+                    try:
+                        spool = future.result()
+                    except Exception as e:
+                        logger.error(f"Exportación: no se pudo leer el documento {document.pk}: {e}")
+                        errors.append(f"{name}: no se pudo leer el archivo firmado")
+                        continue
+
+                    with spool, archive.open(name, mode='w', force_zip64=True) as entry:
+                        while chunk := spool.read(_CHUNK_SIZE):
+                            entry.write(chunk)
+                            yield from _flush(buffer)
+                    yield from _flush(buffer)
+
+                if errors:
+                    archive.writestr('ERRORES.txt', '\n'.join(errors) + '\n')
+            yield from _flush(buffer)
+        finally:
+            # Si el cliente corta la descarga, se descartan las lecturas pendientes
+            for _, _, future in pending:
+                future.cancel()
+            for _, _, future in pending:
+                if not future.cancelled():
+                    try:
+                        future.result().close()
+                    except Exception:
+                        pass
@@ -18,6 +18,29 @@ class DocumentForm(forms.ModelForm):
             'title': 'Título del Documento'
         }
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("widget", MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(d, initial) for d in data]
+        return [single_file_clean(data, initial)]
+
+
+class BatchUploadForm(forms.Form):
+    files = MultipleFileField(
+        label='Seleccionar archivos PDF o un ZIP',
+        validators=[FileExtensionValidator(allowed_extensions=['pdf', 'zip'])],
+        widget=MultipleFileInput(attrs={'accept': 'application/pdf,application/zip,.zip'}),
+    )
+
 class SignatureForm(forms.ModelForm):
     image = forms.ImageField(
         label='Sube tu firma (se recomienda archivo PNG con fondo transparente)',
@@ -40,12 +63,7 @@ from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-import json
-import urllib.request
-import os
-import logging
-
-logger = logging.getLogger(__name__)
+from .notifications import enqueue_email
 
 class CustomPasswordResetForm(PasswordResetForm):
     def save(self, domain_override=None, email_template_name=None,
@@ -67,45 +85,5 @@ class CustomPasswordResetForm(PasswordResetForm):
             domain = domain_override or (request.get_host() if request else 'firma-ing.vooltlab.com')
             link = f"{protocol}://{domain}/accounts/reset/{uid}/{token}/"
             
-            self.send_emailjs(user.email, link)
-
-    def send_emailjs(self, email, link):
-        url = "https://api.emailjs.com/api/v1.0/email/send"
-        
-        service_id = os.getenv('EMAILJS_SERVICE_ID')
-        template_id = os.getenv('EMAILJS_TEMPLATE_ID')
-        public_key = os.getenv('EMAILJS_PUBLIC_KEY')
-        private_key = os.getenv('EMAILJS_PRIVATE_KEY')
-        
-        # Log para verificar que las variables existen (ocultando parcial para seguridad)
-        print(f"DEBUG: EmailJS Config - Service: {service_id}, Template: {template_id}, Public: {public_key[:4]}..., Private: {private_key[:4]}...")
-
-        data = {
-            'service_id': service_id,
-            'template_id': template_id,
-            'user_id': public_key,
-            'accessToken': private_key,
-            'template_params': {
-                'email': email,
-                'link': link,
-            }
-        }
-        
-        req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'))
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        
-        try:
-            with urllib.request.urlopen(req) as response:
-                res_body = response.read().decode('utf-8')
-                print(f"DEBUG: EmailJS Success: {res_body}")
-                logger.info(f"Email enviado correctamente vía EmailJS: {res_body}")
-                return res_body
-        except urllib.error.HTTPError as e:
-            res_body = e.read().decode('utf-8')
-            print(f"DEBUG: EmailJS HTTP Error {e.code}: {res_body}")
-            logger.error(f"EmailJS HTTP Error {e.code}: {res_body}")
-        except Exception as e:
-            print(f"DEBUG: EmailJS Exception: {e}")
-            logger.error(f"Error enviando EmailJS: {e}")
-        
\ No newline at end of file
+            # Se encola el envío: la vista responde sin esperar a EmailJS
+            enqueue_email(user.email, {'link': link})
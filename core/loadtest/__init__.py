@@ -0,0 +1,12 @@
+"""
+Arnés de pruebas de carga de extremo a extremo.
+
+Ejecuta recorridos de usuario reales por HTTP contra un servidor en marcha
+(runserver o gunicorn con la configuración del Dockerfile):
+
+    subir PDF -> abrir editor -> páginas del PDF -> guardar firma -> aplanar -> descargar
+
+Para no depender de MinIO ni de EmailJS, el servidor se arranca con
+STORAGE_BACKEND=local y EMAIL_TRANSPORT=core.notifications.StubTransport.
+Ver los comandos seed_loadtest y run_loadtest.
+"""
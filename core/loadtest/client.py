@@ -0,0 +1,82 @@
+import http.cookiejar
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+
+class LoadTestClient:
+    """
+    Cliente HTTP de un usuario virtual: mantiene su sesión (cookies + CSRF)
+    y registra la latencia de cada petición bajo un nombre de endpoint.
+    """
+    def __init__(self, base_url, stats, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    @property
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, endpoint, method, path, data=None, headers=None):
+        """
+        Ejecuta la petición y la registra en las estadísticas.
+
+        Returns:
+            tuple: (código de estado, cuerpo en bytes, url final tras redirecciones)
+        """
+        headers = {'Referer': self.base_url + '/', **(headers or {})}
+        if method != 'GET':
+            headers['X-CSRFToken'] = self.csrf_token
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                body = response.read()
+                status, final_url = response.status, response.geturl()
+        except urllib.error.HTTPError as e:
+            body, status, final_url = e.read(), e.code, e.geturl()
+        except Exception as e:
+            self.stats.record(endpoint, time.perf_counter() - started, ok=False, error=type(e).__name__)
+            raise
+        self.stats.record(endpoint, time.perf_counter() - started, ok=status < 400, error=None if status < 400 else str(status))
+        return status, body, final_url
+
+    def get(self, endpoint, path):
+        return self.request(endpoint, 'GET', path)
+
+    def post_form(self, endpoint, path, fields):
+        data = urllib.parse.urlencode({**fields, 'csrfmiddlewaretoken': self.csrf_token}).encode()
+        return self.request(endpoint, 'POST', path, data, {'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def post_json(self, endpoint, path, payload):
+        data = json.dumps(payload).encode()
+        return self.request(endpoint, 'POST', path, data, {'Content-Type': 'application/json'})
+
+    def post_multipart(self, endpoint, path, fields, files):
+        """files: {campo: (nombre, bytes, content_type)}"""
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in {**fields, 'csrfmiddlewaretoken': self.csrf_token}.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, (filename, content, content_type) in files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return self.request(
+            endpoint, 'POST', path, b''.join(parts),
+            {'Content-Type': f'multipart/form-data; boundary={boundary}'},
+        )
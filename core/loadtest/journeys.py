@@ -0,0 +1,93 @@
+import re
+
+import fitz
+
+SIGN_LINK_RE = re.compile(rb'/document/(\d+)/sign/')
+TOTAL_PAGES_RE = re.compile(rb'const totalPages = parseInt\("(\d+)"\)')
+
+
+class JourneyError(Exception):
+    pass
+
+
+def make_pdf(pages=3):
+    """PDF sintético con texto en cada página para las subidas."""
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Documento de prueba de carga - página {number}", fontsize=14)
+        page.insert_text((72, 120), "Lorem ipsum dolor sit amet. " * 6, fontsize=9)
+    data = doc.tobytes(garbage=4, deflate=True)
+    doc.close()
+    return data
+
+
+def login(client, username, password):
+    client.get('login_page', '/accounts/login/')
+    status, _, final_url = client.post_form('login', '/accounts/login/', {
+        'username': username,
+        'password': password,
+        'next': '/',
+    })
+    if status >= 400 or '/accounts/login/' in final_url:
+        raise JourneyError(f"No se pudo iniciar sesión como {username}")
+
+
+def browse_pages(client, pk, total_pages):
+    """
+    Pide las páginas como el editor: cada página al mostrarla y sus vecinas
+    como precarga, sin repetir las que ya tiene (pageCache en editor.html).
+    Recorre el documento entero, como quien lo lee antes de firmar.
+    """
+    fetched = set()
+    for current in range(1, total_pages + 1):
+        for number in (current, current - 1, current + 1):
+            if not 1 <= number <= total_pages or number in fetched:
+                continue
+            endpoint = 'document_page' if number == current else 'page_prefetch'
+            status, _, _ = client.get(endpoint, f'/api/document/{pk}/page/{number}/')
+            if status >= 400:
+                raise JourneyError(f'La página {number} del documento no cargó')
+            fetched.add(number)
+
+
+def sign_journey(client, pdf_bytes, iteration):
+    """
+    Recorrido completo de firma:
+    subir -> editor -> páginas -> guardar firma -> aplanar -> descargar.
+    """
+    client.get('upload_page', '/document/upload/')
+    status, body, _ = client.post_multipart(
+        'upload', '/document/upload/',
+        {'title': f'Carga {iteration}'},
+        {'original_file': (f'carga_{iteration}.pdf', pdf_bytes, 'application/pdf')},
+    )
+    # Tras subir se redirige al dashboard; el documento más reciente aparece primero
+    match = SIGN_LINK_RE.search(body)
+    if status >= 400 or not match:
+        raise JourneyError('La subida no devolvió el documento en el dashboard')
+    pk = int(match.group(1))
+
+    status, body, _ = client.get('editor', f'/document/{pk}/sign/')
+    match = TOTAL_PAGES_RE.search(body)
+    if status >= 400 or not match:
+        raise JourneyError('El editor no cargó')
+    browse_pages(client, pk, int(match.group(1)))
+
+    status, _, _ = client.post_json('save_signature', f'/api/document/{pk}/save_signature/', {
+        'placements': [
+            {'x': 60, 'y': 500, 'width': 150, 'height': 60, 'rotation': 0,
+             'page_width': 600, 'page_height': 800, 'page_number': 1},
+        ],
+    })
+    if status >= 400:
+        raise JourneyError('Guardar la firma falló')
+
+    status, _, _ = client.post_json('rasterize', f'/api/documents/{pk}/rasterize/', {})
+    if status >= 400:
+        raise JourneyError('El aplanado falló')
+
+    status, _, _ = client.get('download', f'/document/{pk}/download/')
+    if status >= 400:
+        raise JourneyError('La descarga falló')
+    return pk
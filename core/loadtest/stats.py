@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import defaultdict
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoadTestStats:
+    """Latencias y errores por endpoint, seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.journeys_ok = 0
+        self.journeys_failed = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, seconds, ok=True, error=None):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint][error or 'error'] += 1
+
+    def record_journey(self, ok):
+        with self._lock:
+            if ok:
+                self.journeys_ok += 1
+            else:
+                self.journeys_failed += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def report(self):
+        """Devuelve las líneas del informe final."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        total_requests = sum(len(v) for v in self.latencies.values())
+        lines = [
+            f"Duración: {elapsed:.1f}s  Peticiones: {total_requests}  "
+            f"Throughput: {total_requests / elapsed:.1f} req/s",
+            f"Recorridos completados: {self.journeys_ok}  fallidos: {self.journeys_failed}  "
+            f"({self.journeys_ok / elapsed:.2f} recorridos/s)",
+            '',
+            f"{'endpoint':<18}{'n':>6}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'error %':>9}",
+        ]
+        for endpoint, values in self.latencies.items():
+            values = sorted(values)
+            errors = sum(self.errors[endpoint].values())
+            lines.append(
+                f"{endpoint:<18}{len(values):>6}{len(values) / elapsed:>8.1f}"
+                f"{percentile(values, 0.50) * 1000:>9.0f}{percentile(values, 0.95) * 1000:>9.0f}"
+                f"{percentile(values, 0.99) * 1000:>9.0f}{errors * 100 / len(values):>9.1f}"
+            )
+        for endpoint, kinds in self.errors.items():
+            for kind, count in kinds.items():
+                lines.append(f"  error {endpoint}: {kind} x{count}")
+        return lines
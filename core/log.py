@@ -0,0 +1,121 @@
+"""
+Logging no bloqueante con correlación por petición.
+
+- QueueListenerHandler: los hilos de la app solo encolan el registro; un
+  hilo listener por proceso lo escribe en los handlers reales.
+- RequestIdFilter: añade a cada registro el id de la petición en curso
+  (ver core.middleware.RequestLogMiddleware). Se aplica en el handler de la
+  cola, es decir, en el hilo que registra y no en el listener. Los
+  registros de django.request se emiten cuando el middleware ya terminó,
+  así que para ellos el id se toma de record.request.
+- SamplingFilter: deja pasar solo una fracción de los INFO ruidosos.
+- JsonFormatter: una línea JSON por registro; la traza de una excepción va
+  en el campo exc_info y no dentro de message.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+request_id_var = contextvars.ContextVar('request_id', default='-')
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            request = getattr(record, 'request', None)
+            record.request_id = getattr(request, 'request_id', None) or request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Muestrea los registros INFO (o inferiores) de los loggers indicados.
+    WARNING y superiores siempre pasan.
+    """
+    def __init__(self, rate=1.0, loggers=()):
+        super().__init__()
+        self.rate = float(rate)
+        self.loggers = tuple(loggers)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if self.loggers and not record.name.startswith(self.loggers):
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S%z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'thread': record.threadName,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Traza ya formateada por QueueListenerHandler.prepare
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = record.stack_info
+
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler que arranca su propio QueueListener hacia los handlers dados.
+
+    Se configura desde LOGGING con referencias cfg:// a otros handlers. Se usa
+    la clave '()' y no 'class' porque desde Python 3.12 dictConfig trata las
+    subclases de QueueHandler declaradas con 'class' de forma especial:
+
+        'queue': {
+            '()': 'core.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+        }
+    """
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        # dictConfig entrega un ConvertingList: indexar resuelve las referencias cfg://
+        resolved = [handlers[i] for i in range(len(handlers))]
+        self.listener = QueueListener(self.queue, *resolved, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        """
+        Como QueueHandler.prepare, pero sin pegar la traza al mensaje: se
+        guarda formateada en exc_text y cada formatter decide cómo emitirla.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Nunca bloquear la petición por el logging: se descarta el registro
+            pass
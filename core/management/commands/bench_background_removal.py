@@ -0,0 +1,121 @@
+"""
+Compara la latencia y la memoria de los perfiles de eliminación de fondo.
+
+Cada perfil se mide en un proceso Python limpio para que el RSS de un
+modelo no se sume al del siguiente. Se informa del primer procesado
+(incluye importar rembg y cargar el modelo), la mediana de los siguientes
+y el pico de RSS del proceso.
+
+Sin --image se generan dos imágenes sintéticas: una foto de móvil de
+12 MP con fondo irregular y un escaneo limpio.
+
+    python manage.py bench_background_removal --runs 5
+    python manage.py bench_background_removal --image firma.jpg --profile balanced --profile fast
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter
+
+PROBE = """
+import json, resource, statistics, time
+import django
+django.setup()
+from PIL import Image
+from core.background_removal import remove_background
+image = Image.open({path!r})
+image.load()
+timings = []
+for _ in range({runs}):
+    started = time.perf_counter()
+    result = remove_background(image, profile={profile!r})
+    timings.append(time.perf_counter() - started)
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    'first': timings[0],
+    'steady': statistics.median(timings[1:]) if len(timings) > 1 else timings[0],
+    'rss_mb': rss_kb / 1024,
+    'transparent': result.getchannel('A').histogram()[0] / (result.width * result.height),
+}}))
+"""
+
+
+def _draw_signature(draw, width, height, stroke):
+    """Trazo aleatorio tipo firma en la franja central de la imagen."""
+    rng = random.Random(7)
+    x, y = width * 0.15, height * 0.5
+    points = [(x, y)]
+    while x < width * 0.85:
+        x += rng.uniform(width * 0.01, width * 0.03)
+        y = height * 0.5 + rng.uniform(-height * 0.12, height * 0.12)
+        points.append((x, y))
+    draw.line(points, fill=(25, 30, 80), width=stroke, joint='curve')
+
+
+def make_photo(path):
+    """Foto sintética de móvil: papel con sombra, ruido y trazo de bolígrafo."""
+    width, height = 4032, 3024
+    gradient = Image.linear_gradient('L').resize((width, height)).point(lambda v: 150 + v // 3)
+    noise = Image.effect_noise((width, height), 18)
+    paper = Image.merge('RGB', (
+        Image.blend(gradient, noise, 0.15),
+        Image.blend(gradient, noise, 0.15),
+        Image.blend(gradient, noise, 0.2),
+    ))
+    _draw_signature(ImageDraw.Draw(paper), width, height, stroke=14)
+    paper.filter(ImageFilter.GaussianBlur(1.5)).save(path, format='JPEG', quality=90)
+
+
+def make_scan(path):
+    """Escaneo sintético: papel blanco uniforme y trazo nítido."""
+    width, height = 2480, 1000
+    scan = Image.new('RGB', (width, height), (250, 250, 248))
+    _draw_signature(ImageDraw.Draw(scan), width, height, stroke=8)
+    scan.save(path, format='PNG')
+
+
+class Command(BaseCommand):
+    help = 'Compara latencia y memoria de los perfiles de eliminación de fondo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--image', action='append', help='Imagen a procesar (se puede repetir).')
+        parser.add_argument('--profile', action='append', help='Perfil a medir (por defecto, todos).')
+        parser.add_argument('--runs', type=int, default=3, help='Procesados por perfil e imagen.')
+
+    def handle(self, *args, **options):
+        profiles = options['profile'] or list(settings.BACKGROUND_REMOVAL_PROFILES)
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'firma_project.settings')}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            images = options['image']
+            if not images:
+                images = [os.path.join(tmp, 'foto_movil.jpg'), os.path.join(tmp, 'escaneo.png')]
+                make_photo(images[0])
+                make_scan(images[1])
+
+            for path in images:
+                with Image.open(path) as image:
+                    size = image.size
+                self.stdout.write(f"{os.path.basename(path)} ({size[0]}x{size[1]}):")
+                for profile in profiles:
+                    code = PROBE.format(path=path, runs=max(options['runs'], 1), profile=profile)
+                    proc = subprocess.run(
+                        [sys.executable, '-c', code],
+                        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                    )
+                    if proc.returncode != 0:
+                        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'error desconocido'
+                        self.stdout.write(self.style.WARNING(f"  {profile:<10} no se pudo medir ({error})"))
+                        continue
+                    result = json.loads(proc.stdout.strip().splitlines()[-1])
+                    self.stdout.write(
+                        f"  {profile:<10} primero: {result['first'] * 1000:7.0f} ms   "
+                        f"siguientes: {result['steady'] * 1000:7.0f} ms   RSS pico: {result['rss_mb']:7.1f} MB   "
+                        f"fondo transparente: {result['transparent']:.0%}"
+                    )
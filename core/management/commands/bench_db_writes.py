@@ -0,0 +1,96 @@
+"""
+Prueba de carga de escritura concurrente sobre la base de datos.
+
+Lanza varios hilos que crean y actualizan filas de Document en paralelo
+(igual que varios usuarios firmando a la vez) y reporta el throughput
+y los errores de bloqueo.
+
+Nunca escribe en la base de datos configurada: crea una base de datos de
+pruebas con la misma configuración (TEST.NAME; WAL y busy timeout en
+SQLite), la migra, mide sobre ella y la destruye al terminar. En
+PostgreSQL el usuario necesita permiso CREATEDB, igual que para los tests.
+
+    python manage.py bench_db_writes --threads 8 --writes 200
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from core.models import Document
+
+BENCH_USERNAME = '__bench_db_writes__'
+
+
+class Command(BaseCommand):
+    help = 'Mide el throughput de Document.save() con escrituras concurrentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Hilos escritores en paralelo.')
+        parser.add_argument('--writes', type=int, default=100, help='Escrituras por hilo.')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        self.stdout.write(f"Base de datos temporal: {test_name}")
+        try:
+            self.run_benchmark(options['threads'], options['writes'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run_benchmark(self, threads, writes):
+        vendor = connection.vendor
+        if vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            self.stdout.write(f"Backend: sqlite (journal_mode={journal_mode})")
+        else:
+            self.stdout.write(f"Backend: {vendor}")
+
+        owner, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'is_active': False})
+        lock = threading.Lock()
+        stats = {'ok': 0, 'locked': 0, 'latencies': []}
+
+        def worker(worker_id):
+            try:
+                for i in range(writes):
+                    started = time.perf_counter()
+                    try:
+                        # Creación + cambio de estado: el mismo patrón que upload y api_save_signature
+                        document = Document(
+                            owner=owner,
+                            title=f'bench-{worker_id}-{i}',
+                            original_file=f'documents/original/bench-{worker_id}-{i}.pdf',
+                        )
+                        document.save()
+                        document.status = 'signed'
+                        document.save()
+                    except OperationalError:
+                        with lock:
+                            stats['locked'] += 1
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        stats['ok'] += 1
+                        stats['latencies'].append(elapsed)
+            finally:
+                # Cada hilo tiene su propia conexión; cerrarla evita fugas
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, range(threads)))
+        total = time.perf_counter() - started
+
+        latencies = sorted(stats['latencies'])
+        self.stdout.write(f"Hilos: {threads}  Escrituras por hilo: {writes}")
+        self.stdout.write(f"Completadas: {stats['ok']}  Errores de bloqueo: {stats['locked']}")
+        self.stdout.write(f"Tiempo total: {total:.2f}s  Throughput: {stats['ok'] / total:.1f} docs/s")
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(f"Latencia p50: {p50 * 1000:.1f} ms  p99: {p99 * 1000:.1f} ms")
@@ -0,0 +1,68 @@
+"""
+Mide el coste de arranque de un worker: tiempo de importación y RSS.
+
+Cada escenario se ejecuta en un proceso Python limpio que hace lo mismo
+que un worker de gunicorn al arrancar (django.setup() + cargar las URLs,
+que importan core.views). El escenario "con rembg" añade la importación
+de rembg para mostrar lo que cuesta cargar los modelos de IA al arrancar.
+
+    python manage.py bench_startup --runs 3
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+PROBE = """
+import json, os, resource, time
+started = time.perf_counter()
+import django
+django.setup()
+import importlib
+importlib.import_module({urlconf!r})
+{extra}
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_kb / 1024, 'rembg_loaded': 'rembg' in __import__('sys').modules}}))
+"""
+
+SCENARIOS = (
+    ('worker (rembg diferido)', ''),
+    ('worker + import rembg', 'import rembg'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de importación y el RSS de arranque de un worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Ejecuciones por escenario (se toma la mediana).')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'firma_project.settings')}
+
+        for label, extra in SCENARIOS:
+            code = PROBE.format(urlconf=settings.ROOT_URLCONF, extra=extra)
+            results = []
+            for _ in range(options['runs']):
+                proc = subprocess.run(
+                    [sys.executable, '-c', code],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                )
+                if proc.returncode != 0:
+                    error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'error desconocido'
+                    self.stdout.write(self.style.WARNING(f"{label}: no se pudo medir ({error})"))
+                    break
+                results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            if not results:
+                continue
+
+            seconds = sorted(r['seconds'] for r in results)[len(results) // 2]
+            rss = sorted(r['rss_mb'] for r in results)[len(results) // 2]
+            self.stdout.write(
+                f"{label:<28} import: {seconds * 1000:7.0f} ms   RSS: {rss:7.1f} MB   "
+                f"rembg cargado: {'sí' if results[0]['rembg_loaded'] else 'no'}"
+            )
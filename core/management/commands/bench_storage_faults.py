@@ -0,0 +1,73 @@
+"""
+Ejercita la capa de resiliencia del storage con fallos inyectados.
+
+Usa FaultyFileSystemStorage sobre un directorio temporal (no toca MinIO ni
+MEDIA_ROOT) y, para cada escenario, lee los mismos archivos una y otra vez
+informando de cuántas lecturas acaban bien, cuántas agotan los reintentos,
+cuántas fallan de inmediato con el circuito abierto y la latencia.
+
+    python manage.py bench_storage_faults --operations 200
+"""
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core import storage as resilient_storage
+from core.loadtest.stats import percentile
+
+# (nombre, probabilidad de fallo, latencia por operación en segundos)
+SCENARIOS = (
+    ('sano', 0.0, 0.0),
+    ('inestable (20 %)', 0.2, 0.005),
+    ('muy inestable (60 %)', 0.6, 0.005),
+    ('caído', 1.0, 0.05),
+)
+
+
+class Command(BaseCommand):
+    help = 'Mide reintentos y circuit breaker del storage con fallos inyectados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=200, help='Lecturas por escenario.')
+        parser.add_argument('--files', type=int, default=10, help='Archivos distintos a leer.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as location:
+            for label, rate, latency in SCENARIOS:
+                with override_settings(STORAGE_FAULT_RATE=rate, STORAGE_FAULT_LATENCY=latency):
+                    self.run_scenario(label, location, options['operations'], options['files'])
+
+    def run_scenario(self, label, location, operations, file_count):
+        # Circuito nuevo en cada escenario
+        resilient_storage._breakers.pop(resilient_storage.FaultyFileSystemStorage.breaker_name, None)
+        storage = resilient_storage.FaultyFileSystemStorage(location=location)
+        names = []
+        with override_settings(STORAGE_FAULT_RATE=0, STORAGE_FAULT_LATENCY=0):
+            for i in range(file_count):
+                names.append(storage.save(f"bench/{i}.pdf", ContentFile(b'%PDF-1.4\n' + b'0' * 4096)))
+
+        ok = exhausted = fail_fast = 0
+        timings = []
+        for i in range(operations):
+            was_open = storage.breaker.state == 'open'
+            started = time.perf_counter()
+            try:
+                with storage.open(names[i % file_count], 'rb') as f:
+                    f.read()
+                ok += 1
+            except resilient_storage.StorageUnavailable:
+                if was_open:
+                    fail_fast += 1
+                else:
+                    exhausted += 1
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        self.stdout.write(
+            f"{label:<22} ok: {ok:4d}  agotados: {exhausted:4d}  fallo rápido: {fail_fast:4d}   "
+            f"p50: {percentile(timings, 0.5):7.1f} ms  p95: {percentile(timings, 0.95):7.1f} ms  "
+            f"máx: {timings[-1]:7.1f} ms  circuito: {storage.breaker.state}"
+        )
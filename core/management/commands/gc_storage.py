@@ -0,0 +1,211 @@
+"""
+Recolección de basura del almacenamiento (MinIO/S3).
+
+1. Purga los documentos eliminados lógicamente hace más de
+   SOFT_DELETE_RETENTION_DAYS: borra sus archivos y la fila.
+2. Recorre el bucket por lotes y borra los objetos que ninguna fila
+   referencia (salidas reemplazadas por un nuevo aplanado, firmas
+   antiguas, etc.) y que tienen más de STORAGE_GC_GRACE_HOURS.
+
+El recorrido es incremental: guarda la última clave revisada en
+MaintenanceCheckpoint y la siguiente ejecución continúa desde ahí.
+
+    python manage.py gc_storage --dry-run
+    python manage.py gc_storage --max-objects 5000
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Document, MaintenanceCheckpoint, Signature
+
+CHECKPOINT_NAME = 'gc_storage'
+# Prefijos gestionados por la aplicación (upload_to de los FileField)
+MANAGED_PREFIXES = ('documents/original/', 'documents/signed/', 'documents/working/', 'signatures/')
+# Límite de claves por llamada a DeleteObjects en S3
+S3_DELETE_BATCH = 1000
+
+
+class Command(BaseCommand):
+    help = 'Elimina del almacenamiento los archivos huérfanos y los de documentos eliminados expirados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo reporta lo que se borraría.')
+        parser.add_argument(
+            '--grace-hours', type=int, default=settings.STORAGE_GC_GRACE_HOURS,
+            help='Antigüedad mínima de un objeto huérfano para borrarlo.',
+        )
+        parser.add_argument(
+            '--retention-days', type=int, default=settings.SOFT_DELETE_RETENTION_DAYS,
+            help='Días que se conservan los documentos eliminados lógicamente.',
+        )
+        parser.add_argument(
+            '--max-objects', type=int, default=10000,
+            help='Objetos del bucket a revisar en esta ejecución (0 = todos).',
+        )
+        parser.add_argument('--reset', action='store_true', help='Reinicia el recorrido desde el principio.')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.storage = default_storage
+        self.is_s3 = hasattr(self.storage, 'bucket')
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('Modo simulación: no se borrará nada.'))
+
+        purged, purged_files = self.purge_expired_documents(options['retention_days'])
+        orphans, orphan_bytes, scanned, finished = self.sweep_orphans(
+            options['grace_hours'], options['max_objects'], options['reset'],
+        )
+
+        self.stdout.write(f"Documentos expirados purgados: {purged} ({purged_files} archivos)")
+        self.stdout.write(f"Objetos revisados: {scanned}")
+        self.stdout.write(f"Objetos huérfanos: {orphans} ({orphan_bytes / (1024 * 1024):.1f} MB)")
+        if not finished:
+            self.stdout.write('Recorrido incompleto: la próxima ejecución continuará desde el checkpoint.')
+
+    # --- Documentos eliminados lógicamente ---
+    def purge_expired_documents(self, retention_days):
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        expired_pks = list(
+            Document.objects.filter(is_active=False, deleted_at__lt=cutoff).values_list('pk', flat=True)
+        )
+
+        purged = 0
+        purged_files = 0
+        for pks in self._chunks(expired_pks, 500):
+            chunk = list(Document.objects.filter(pk__in=pks))
+            names = []
+            for document in chunk:
+                names.append(document.original_file.name)
+                if document.signed_file:
+                    names.append(document.signed_file.name)
+                if document.working_file:
+                    names.append(document.working_file.name)
+            names = [name for name in names if name]
+
+            self._delete(names)
+            if not self.dry_run:
+                Document.objects.filter(pk__in=pks).delete()
+            purged += len(chunk)
+            purged_files += len(names)
+        return purged, purged_files
+
+    # --- Objetos sin referencia ---
+    def sweep_orphans(self, grace_hours, max_objects, reset):
+        checkpoint, _ = MaintenanceCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        start_after = '' if reset else checkpoint.position
+        cutoff = timezone.now() - timedelta(hours=grace_hours)
+
+        orphans = 0
+        orphan_bytes = 0
+        scanned = 0
+        finished = True
+        last_key = start_after
+
+        batch_size = min(S3_DELETE_BATCH, max_objects) if max_objects else S3_DELETE_BATCH
+        for batch in self._chunks(self._list_objects(start_after), batch_size):
+            scanned += len(batch)
+            last_key = batch[-1][0]
+            names = [name for name, _, _ in batch]
+            referenced = self._referenced(names)
+
+            to_delete = []
+            for name, size, modified in batch:
+                if name in referenced or modified > cutoff:
+                    continue
+                to_delete.append(name)
+                orphan_bytes += size
+                if self.verbosity_detail:
+                    self.stdout.write(f"  huérfano: {name}")
+
+            orphans += len(to_delete)
+            self._delete(to_delete)
+
+            if max_objects and scanned >= max_objects:
+                finished = False
+                break
+
+        if not self.dry_run:
+            # Al completar el recorrido se vuelve a empezar en la siguiente ejecución
+            checkpoint.position = '' if finished else last_key
+            checkpoint.save()
+        return orphans, orphan_bytes, scanned, finished
+
+    @property
+    def verbosity_detail(self):
+        return self.dry_run or self.verbosity > 1
+
+    def _referenced(self, names):
+        documents = Document.objects.filter(
+            Q(original_file__in=names) | Q(signed_file__in=names) | Q(working_file__in=names)
+        ).values_list('original_file', 'signed_file', 'working_file')
+        referenced = {name for files in documents for name in files if name}
+        referenced.update(Signature.objects.filter(image__in=names).values_list('image', flat=True))
+        return referenced
+
+    def _list_objects(self, start_after):
+        """Genera (nombre, tamaño, fecha de modificación) en orden de clave."""
+        if self.is_s3:
+            client = self.storage.connection.meta.client
+            location = self.storage.location.strip('/')
+            prefix = f"{location}/" if location else ''
+            paginator = client.get_paginator('list_objects_v2')
+            params = {'Bucket': self.storage.bucket_name, 'Prefix': prefix}
+            if start_after:
+                params['StartAfter'] = prefix + start_after
+            for page in paginator.paginate(**params):
+                for obj in page.get('Contents', []):
+                    name = obj['Key'][len(prefix):]
+                    if name.startswith(MANAGED_PREFIXES):
+                        yield name, obj['Size'], obj['LastModified']
+        else:
+            for name in sorted(self._walk_local()):
+                if name > start_after:
+                    yield name, self.storage.size(name), self.storage.get_modified_time(name)
+
+    def _walk_local(self):
+        for prefix in MANAGED_PREFIXES:
+            pending = [prefix.rstrip('/')]
+            while pending:
+                directory = pending.pop()
+                if not self.storage.exists(directory):
+                    continue
+                dirs, files = self.storage.listdir(directory)
+                pending.extend(f"{directory}/{d}" for d in dirs)
+                for file_name in files:
+                    yield f"{directory}/{file_name}"
+
+    def _delete(self, names):
+        if not names or self.dry_run:
+            return
+        if self.is_s3:
+            client = self.storage.connection.meta.client
+            location = self.storage.location.strip('/')
+            prefix = f"{location}/" if location else ''
+            for chunk in self._chunks(names, S3_DELETE_BATCH):
+                response = client.delete_objects(
+                    Bucket=self.storage.bucket_name,
+                    Delete={'Objects': [{'Key': prefix + name} for name in chunk], 'Quiet': True},
+                )
+                for error in response.get('Errors', []):
+                    self.stderr.write(f"Error borrando {error['Key']}: {error.get('Message')}")
+        else:
+            for name in names:
+                self.storage.delete(name)
+
+    @staticmethod
+    def _chunks(iterable, size):
+        chunk = []
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,73 @@
+"""
+Resume las mediciones de memoria guardadas con MEMORY_PROFILING=True.
+
+    python manage.py memory_report --hours 24 --top 10
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+
+from core.models import MemoryProfile
+
+MB = 1024 * 1024
+
+
+def _mb(value):
+    # Sin pico cuando la medición se solapó con otra (ver core/memory_profile.py)
+    return f"{value / MB:.1f} MB" if value is not None else 'solapado'
+
+
+class Command(BaseCommand):
+    help = 'Muestra las operaciones con mayor consumo de memoria.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Ventana de tiempo a analizar.')
+        parser.add_argument('--top', type=int, default=10, help='Número de peores mediciones a listar.')
+        parser.add_argument('--purge-days', type=int, help='Borra las mediciones más antiguas que N días.')
+
+    def handle(self, *args, **options):
+        if options['purge_days']:
+            cutoff = timezone.now() - timedelta(days=options['purge_days'])
+            deleted, _ = MemoryProfile.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(f"Mediciones borradas: {deleted}")
+
+        since = timezone.now() - timedelta(hours=options['hours'])
+        profiles = MemoryProfile.objects.filter(created_at__gte=since).annotate(
+            rss_delta=F('rss_after') - F('rss_before'),
+        )
+        if not profiles.exists():
+            self.stdout.write('No hay mediciones en la ventana indicada (¿MEMORY_PROFILING activo?).')
+            return
+
+        self.stdout.write(f"Por operación (últimas {options['hours']} h):")
+        self.stdout.write(
+            f"  {'operación':<22}{'n':>6}{'pico py medio':>15}{'pico py máx':>13}"
+            f"{'ΔRSS máx':>11}{'RSS pico':>11}{'ms medio':>10}"
+        )
+        summary = profiles.values('operation').annotate(
+            n=Count('id'),
+            avg_peak=Avg('tracemalloc_peak'),
+            max_peak=Max('tracemalloc_peak'),
+            max_rss_delta=Max('rss_delta'),
+            max_peak_rss=Max('peak_rss'),
+            avg_ms=Avg('duration_ms'),
+        ).order_by(F('max_peak').desc(nulls_last=True))
+        for row in summary:
+            self.stdout.write(
+                f"  {row['operation']:<22}{row['n']:>6}{_mb(row['avg_peak']):>15}"
+                f"{_mb(row['max_peak']):>13}{row['max_rss_delta'] / MB:>8.1f} MB"
+                f"{row['max_peak_rss'] / MB:>8.0f} MB{row['avg_ms']:>10.0f}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(f"Peores {options['top']} mediciones (por ΔRSS):")
+        for profile in profiles.order_by('-rss_delta', '-tracemalloc_peak')[:options['top']]:
+            size = f"{profile.file_size / MB:.1f} MB" if profile.file_size else '-'
+            self.stdout.write(
+                f"  {profile.created_at:%Y-%m-%d %H:%M}  {profile.operation:<20} doc={profile.document_id or '-':<7} "
+                f"tamaño={size:<9} páginas={profile.page_count or '-':<5} "
+                f"pico py={_mb(profile.tracemalloc_peak)}  ΔRSS={profile.rss_delta / MB:.1f} MB  "
+                f"{profile.duration_ms:.0f} ms"
+            )
@@ -0,0 +1,31 @@
+"""
+Genera la copia de trabajo normalizada de los documentos que no la tienen
+(por ejemplo, los subidos antes de que existiera la normalización).
+
+    python manage.py normalize_documents
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import Document
+from core.tasks import normalize_document
+
+
+class Command(BaseCommand):
+    help = 'Crea la copia de trabajo normalizada de los documentos que no la tienen.'
+
+    def handle(self, *args, **options):
+        documents = Document.objects.filter(is_active=True).filter(
+            Q(working_file='') | Q(working_file__isnull=True)
+        )
+
+        normalized = 0
+        failed = 0
+        for pk in documents.values_list('pk', flat=True).iterator():
+            try:
+                normalize_document(pk)
+                normalized += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Documento {pk}: {e}")
+        self.stdout.write(f"Documentos normalizados: {normalized}  Errores: {failed}")
@@ -0,0 +1,33 @@
+"""
+Extrae el texto de los documentos para la búsqueda de texto completo.
+
+    python manage.py reindex_documents          # solo los que no tienen texto
+    python manage.py reindex_documents --all
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Document
+from core.search import index_document
+
+
+class Command(BaseCommand):
+    help = 'Indexa el contenido de los documentos para la búsqueda.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reindexa también los ya indexados.')
+
+    def handle(self, *args, **options):
+        documents = Document.objects.filter(is_active=True)
+        if not options['all']:
+            documents = documents.filter(content__isnull=True)
+
+        indexed = 0
+        failed = 0
+        for pk in documents.values_list('pk', flat=True).iterator():
+            try:
+                index_document(pk)
+                indexed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Documento {pk}: {e}")
+        self.stdout.write(f"Documentos indexados: {indexed}  Errores: {failed}")
@@ -0,0 +1,68 @@
+"""
+Ejecuta recorridos de firma concurrentes contra un servidor en marcha y
+reporta throughput, latencias p50/p95/p99 por endpoint y tasa de errores.
+
+Servidor sin MinIO ni EmailJS (en otra terminal):
+
+    STORAGE_BACKEND=local EMAIL_TRANSPORT=core.notifications.StubTransport \\
+        gunicorn --workers 3 --worker-class gthread --threads 2 firma_project.wsgi:application
+
+Prueba:
+
+    python manage.py seed_loadtest --users 10
+    python manage.py run_loadtest --base-url http://127.0.0.1:8000 --concurrency 10 --iterations 5
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.loadtest.client import LoadTestClient
+from core.loadtest.journeys import JourneyError, login, make_pdf, sign_journey
+from core.loadtest.stats import LoadTestStats
+from .seed_loadtest import DEFAULT_PASSWORD, USERNAME_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga de extremo a extremo del flujo de firma.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=5, help='Usuarios virtuales en paralelo.')
+        parser.add_argument('--iterations', type=int, default=3, help='Recorridos por usuario virtual.')
+        parser.add_argument('--seeded-users', type=int, default=10, help='Usuarios creados con seed_loadtest.')
+        parser.add_argument('--pages', type=int, default=3, help='Páginas del PDF de prueba.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--timeout', type=int, default=120, help='Timeout por petición (segundos).')
+
+    def handle(self, *args, **options):
+        stats = LoadTestStats()
+        pdf_bytes = make_pdf(options['pages'])
+
+        def virtual_user(number):
+            client = LoadTestClient(options['base_url'], stats, timeout=options['timeout'])
+            username = f"{USERNAME_PREFIX}{number % options['seeded_users']}"
+            try:
+                login(client, username, options['password'])
+            except Exception as e:
+                self.stderr.write(f"[{username}] {e}")
+                for _ in range(options['iterations']):
+                    stats.record_journey(ok=False)
+                return
+            for iteration in range(options['iterations']):
+                try:
+                    sign_journey(client, pdf_bytes, f"{number}-{iteration}")
+                    stats.record_journey(ok=True)
+                except (JourneyError, OSError) as e:
+                    self.stderr.write(f"[{username}] {e}")
+                    stats.record_journey(ok=False)
+
+        self.stdout.write(
+            f"Lanzando {options['concurrency']} usuarios x {options['iterations']} recorridos "
+            f"contra {options['base_url']}"
+        )
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(virtual_user, range(options['concurrency'])))
+        stats.stop()
+
+        for line in stats.report():
+            self.stdout.write(line)
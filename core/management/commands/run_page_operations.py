@@ -0,0 +1,34 @@
+"""
+Retoma las operaciones de páginas abandonadas.
+
+Una operación que un worker no llegó a empezar o dejó a medias (reinicio,
+despliegue) se queda 'pending' o 'running'; pasado PAGE_OPERATION_TIMEOUT
+este comando la vuelve a ejecutar.
+
+    python manage.py run_page_operations
+    python manage.py run_page_operations --loop --interval 60
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.page_operations import resume_stale_page_operations
+
+
+class Command(BaseCommand):
+    help = 'Retoma las operaciones de páginas abandonadas por un worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Revisa las operaciones de forma continua.')
+        parser.add_argument('--interval', type=int, default=60, help='Segundos entre pasadas con --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            resumed = resume_stale_page_operations()
+            if resumed:
+                self.stdout.write(f"Operaciones retomadas: {resumed}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+"""
+Crea los usuarios (con su firma) que usa run_loadtest.
+
+    python manage.py seed_loadtest --users 20
+    python manage.py seed_loadtest --cleanup
+"""
+import io
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+
+from core.models import Document, Signature
+
+USERNAME_PREFIX = 'loadtest_'
+DEFAULT_PASSWORD = 'carga-12345'
+
+
+def make_signature_png():
+    """Firma sintética en PNG con fondo transparente (no pasa por rembg)."""
+    image = Image.new('RGBA', (600, 200), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.line([(20, 150), (120, 40), (200, 160), (320, 50), (420, 150), (580, 60)], fill=(0, 40, 120, 255), width=8)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Crea (o elimina) los usuarios de prueba de carga con su firma.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Usuarios a crear.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--cleanup', action='store_true', help='Elimina usuarios y documentos de carga.')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        if options['cleanup']:
+            for document in Document.objects.filter(owner__in=users):
+                document.original_file.delete(save=False)
+                if document.signed_file:
+                    document.signed_file.delete(save=False)
+                if document.working_file:
+                    document.working_file.delete(save=False)
+            for signature in Signature.objects.filter(user__in=users):
+                signature.image.delete(save=False)
+            count = users.count()
+            users.delete()
+            self.stdout.write(f"Usuarios de carga eliminados: {count}")
+            return
+
+        png = make_signature_png()
+        for number in range(options['users']):
+            user, created = User.objects.get_or_create(username=f"{USERNAME_PREFIX}{number}")
+            if created:
+                user.set_password(options['password'])
+                user.save()
+            if not Signature.objects.filter(user=user).exists():
+                signature = Signature(user=user)
+                signature.image.save(f"signature_{user.id}_loadtest.png", ContentFile(png), save=False)
+                signature.save()
+        self.stdout.write(f"Usuarios de carga listos: {options['users']} (contraseña: {options['password']})")
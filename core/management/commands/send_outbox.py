@@ -0,0 +1,33 @@
+"""
+Envía los correos pendientes de la bandeja de salida.
+
+Los workers web ya procesan la bandeja en segundo plano; este comando
+sirve para vaciarla tras un reinicio o como proceso dedicado (--loop).
+
+    python manage.py send_outbox
+    python manage.py send_outbox --loop --interval 15
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.notifications import process_outbox
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida con reintentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Procesa la bandeja de forma continua.')
+        parser.add_argument('--interval', type=int, default=15, help='Segundos entre pasadas con --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            sent = process_outbox(schedule_retry=False)
+            if sent:
+                self.stdout.write(f"Correos enviados: {sent}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,116 @@
+"""
+Instrumentación de memoria opcional por operación (MEMORY_PROFILING=True).
+
+Para cada operación envuelta con profile_memory() se registra:
+- el pico de memoria Python con tracemalloc;
+- el RSS del proceso antes y después, que sí incluye los buffers de
+  MuPDF, Pillow y onnxruntime que tracemalloc no ve;
+- el pico de RSS del proceso (ru_maxrss) al terminar;
+- tamaño del documento y número de páginas si el llamador los indica.
+
+tracemalloc es global al proceso y tiene un único pico: cada operación lo
+reinicia al empezar. El pico solo es válido si la operación se ejecutó
+sola; si otra operación medida se solapó con ella (otro hilo del mismo
+worker), su pico se guarda como None en lugar de un valor mezclado. El
+RSS sí se registra siempre, pero con solapes incluye memoria ajena.
+
+Los resultados se guardan en MemoryProfile; ver el comando memory_report.
+"""
+import logging
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger('core')
+
+# Operaciones medidas en curso en el proceso -> True si alguna otra se solapó con ella
+_sections = {}
+_sections_lock = threading.Lock()
+
+
+def _current_rss():
+    """RSS actual del proceso en bytes (Linux: /proc/self/statm)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        # Sin /proc (macOS, etc.) se usa el pico como aproximación
+        return _peak_rss()
+
+
+def _peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def profile_memory(operation, **attrs):
+    """
+    Mide la memoria del bloque y la guarda en MemoryProfile.
+
+    Devuelve un dict en el que el bloque puede completar document_id,
+    file_size y page_count cuando los conozca:
+
+        with profile_memory('rasterize_pdf') as info:
+            info['page_count'] = doc.page_count
+    """
+    info = dict(attrs)
+    if not getattr(settings, 'MEMORY_PROFILING', False):
+        yield info
+        return
+
+    token = object()
+    with _sections_lock:
+        if _sections:
+            # reset_peak invalida el pico de las operaciones en curso, y ellas el nuestro
+            for other in _sections:
+                _sections[other] = True
+        else:
+            tracemalloc.start()
+        _sections[token] = bool(_sections)
+        tracemalloc.reset_peak()
+
+    rss_before = _current_rss()
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        rss_after = _current_rss()
+        with _sections_lock:
+            overlapped = _sections.pop(token)
+            _, traced_peak = tracemalloc.get_traced_memory()
+            if not _sections:
+                tracemalloc.stop()
+        if overlapped:
+            traced_peak = None
+        _save(operation, info, traced_peak, rss_before, rss_after, duration_ms)
+
+
+def _save(operation, info, traced_peak, rss_before, rss_after, duration_ms):
+    from .models import MemoryProfile
+    from .tasks import run_in_background
+
+    peak = f"{traced_peak / 1048576:.1f} MB" if traced_peak is not None else 'no disponible (solapada)'
+    logger.info(
+        f"Memoria {operation}: pico python {peak}, "
+        f"RSS {rss_before / 1048576:.0f} -> {rss_after / 1048576:.0f} MB",
+        extra={'operation': operation, 'tracemalloc_peak': traced_peak, 'rss_delta': rss_after - rss_before},
+    )
+    record = MemoryProfile(
+        operation=operation,
+        document_id=info.get('document_id'),
+        file_size=info.get('file_size'),
+        page_count=info.get('page_count'),
+        tracemalloc_peak=traced_peak,
+        rss_before=rss_before,
+        rss_after=rss_after,
+        peak_rss=_peak_rss(),
+        duration_ms=duration_ms,
+    )
+    # La escritura en la base de datos no bloquea la petición medida
+    run_in_background(record.save)
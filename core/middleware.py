@@ -0,0 +1,68 @@
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from .log import request_id_var
+
+logger = logging.getLogger('core.request')
+
+
+class RequestLogMiddleware:
+    """
+    Asigna un id a cada petición (o reutiliza X-Request-ID del proxy),
+    lo expone en la respuesta y registra la duración de la petición.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+        # django.request registra las respuestas 4xx/5xx después de que este
+        # middleware restaure el contextvar; RequestIdFilter lo lee de aquí
+        request.request_id = request_id
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            response['X-Request-ID'] = request_id
+            logger.info(
+                f"{request.method} {request.path} {response.status_code} {duration_ms}ms",
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'status_code': response.status_code,
+                    'duration_ms': duration_ms,
+                },
+            )
+            return response
+        finally:
+            request_id_var.reset(token)
+
+
+class StorageUnavailableMiddleware:
+    """
+    Convierte StorageUnavailable (core/storage.py) no capturado en un 503
+    con Retry-After en lugar de un 500 genérico.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        from .storage import StorageUnavailable
+
+        if not isinstance(exception, StorageUnavailable):
+            return None
+        logger.warning(f"{request.method} {request.path}: {exception}")
+        if request.path.startswith('/api/'):
+            response = JsonResponse({'status': 'error', 'message': str(exception)}, status=503)
+        else:
+            response = HttpResponse(str(exception), status=503, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(settings.STORAGE_BREAKER_RESET_SECONDS)
+        return response
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:34
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_deleted_at(apps, schema_editor):
+    # Los documentos ya eliminados empiezan su periodo de retención ahora
+    Document = apps.get_model('core', 'Document')
+    Document.objects.filter(is_active=False, deleted_at__isnull=True).update(deleted_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_document_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.CharField(blank=True, default='', max_length=1024)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_deleted_at, migrations.RunPython.noop),
+    ]
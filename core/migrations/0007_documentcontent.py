@@ -0,0 +1,88 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# --- Índice de texto completo según el motor de base de datos ---
+SQLITE_FORWARD = [
+    # Tabla FTS5 de contenido externo: el texto vive en core_documentcontent y
+    # los triggers mantienen el índice sincronizado.
+    """
+    CREATE VIRTUAL TABLE core_documentcontent_fts USING fts5(
+        title, text,
+        content='core_documentcontent', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER core_documentcontent_ai AFTER INSERT ON core_documentcontent BEGIN
+        INSERT INTO core_documentcontent_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER core_documentcontent_ad AFTER DELETE ON core_documentcontent BEGIN
+        INSERT INTO core_documentcontent_fts(core_documentcontent_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER core_documentcontent_au AFTER UPDATE ON core_documentcontent BEGIN
+        INSERT INTO core_documentcontent_fts(core_documentcontent_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO core_documentcontent_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_documentcontent_au",
+    "DROP TRIGGER IF EXISTS core_documentcontent_ad",
+    "DROP TRIGGER IF EXISTS core_documentcontent_ai",
+    "DROP TABLE IF EXISTS core_documentcontent_fts",
+]
+POSTGRES_FORWARD = [
+    # Columna generada: PostgreSQL la recalcula en cada INSERT/UPDATE
+    """
+    ALTER TABLE core_documentcontent ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(text, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX core_documentcontent_search_gin ON core_documentcontent USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS core_documentcontent_search_gin",
+    "ALTER TABLE core_documentcontent DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('text', models.TextField(blank=True, default='')),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='content', to='core.document')),
+            ],
+        ),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_documentcontent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemoryProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation', models.CharField(max_length=50)),
+                ('document_id', models.BigIntegerField(blank=True, null=True)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('page_count', models.IntegerField(blank=True, null=True)),
+                ('tracemalloc_peak', models.BigIntegerField()),
+                ('rss_before', models.BigIntegerField()),
+                ('rss_after', models.BigIntegerField()),
+                ('peak_rss', models.BigIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['operation', 'created_at'], name='core_memory_operati_83b155_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_idempotency_document_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='working_file',
+            field=models.FileField(blank=True, null=True, upload_to='documents/working/'),
+        ),
+    ]
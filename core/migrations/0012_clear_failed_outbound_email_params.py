@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:05
+
+from django.db import migrations
+
+
+def clear_failed_params(apps, schema_editor):
+    # Los correos ya descartados conservaban el enlace de restablecimiento
+    OutboundEmail = apps.get_model('core', 'OutboundEmail')
+    OutboundEmail.objects.filter(status='failed').exclude(template_params={}).update(template_params={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_pageoperation'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_failed_params, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_clear_failed_outbound_email_params'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memoryprofile',
+            name='tracemalloc_peak',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
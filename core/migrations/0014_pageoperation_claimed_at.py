@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_memoryprofile_tracemalloc_peak_nullable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pageoperation',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Signature(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -20,10 +21,166 @@ class Document(models.Model):
     title = models.CharField(max_length=200)
     original_file = models.FileField(upload_to='documents/original/')
     signed_file = models.FileField(upload_to='documents/signed/', null=True, blank=True)
+    # Copia normalizada del original (reparada y recomprimida al subirla, ver
+    # tasks.normalize_document); es la que abren el editor y las operaciones.
+    working_file = models.FileField(upload_to='documents/working/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploaded')
     is_active = models.BooleanField(default=True)
+    # Momento de la eliminación lógica; a partir de él corre el periodo de retención
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    # Control de concurrencia optimista (ver core/mutations.py): version sube con
+    # cada modificación y locked_until marca una operación pesada en curso.
+    version = models.PositiveIntegerField(default=1)
+    locked_until = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    @property
+    def pdf_source(self):
+        """Archivo a abrir para operar: la copia de trabajo si ya existe, si no el original."""
+        return self.working_file or self.original_file
+
+
+class DocumentContent(models.Model):
+    """
+    Texto extraído de un documento para la búsqueda de texto completo.
+
+    Se guarda aparte de Document para que los listados no carguen el texto.
+    El índice vive en la base de datos (ver migración 0007 y core/search.py):
+    tabla FTS5 en SQLite o columna tsvector con índice GIN en PostgreSQL.
+    """
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='content')
+    title = models.CharField(max_length=200)
+    text = models.TextField(blank=True, default='')
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Contenido de {self.title}"
+
+class MaintenanceCheckpoint(models.Model):
+    """
+    Posición guardada de una tarea de mantenimiento incremental
+    (por ejemplo, la última clave del bucket revisada por gc_storage).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.CharField(max_length=1024, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
+
+
+class PageOperation(models.Model):
+    """
+    Operación de páginas (extraer, dividir, unir) que se ejecuta en segundo
+    plano; el cliente consulta su estado (ver core/page_operations.py).
+    """
+    KIND_CHOICES = (
+        ('extract', 'Extraer páginas'),
+        ('split', 'Dividir'),
+        ('merge', 'Unir'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pendiente'),
+        ('running', 'En curso'),
+        ('done', 'Terminada'),
+        ('failed', 'Fallida'),
+    )
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Documentos de origen (en orden, para unir), rangos y título
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True, default='')
+    result_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Momento en que un worker la tomó; pasado PAGE_OPERATION_TIMEOUT otro puede retomarla
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Resultado guardado de una petición mutadora enviada con cabecera
+    Idempotency-Key; un reintento con la misma clave recibe esta respuesta
+    sin repetir el trabajo (ver core/mutations.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    path = models.CharField(max_length=255)
+    # Huella de método, ruta y cuerpo para detectar claves reutilizadas con otra petición
+    request_hash = models.CharField(max_length=64)
+    # Nulos mientras la petición original sigue en curso
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user')]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Bandeja de salida de correos: la petición solo inserta la fila y un
+    trabajo en segundo plano la envía con reintentos (ver core/notifications.py).
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pendiente'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Fallido'),
+    )
+
+    to_email = models.EmailField()
+    template_params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.to_email} ({self.status})"
+
+
+class MemoryProfile(models.Model):
+    """
+    Medición de memoria de una operación pesada (ver core/memory_profile.py).
+    Solo se registran con MEMORY_PROFILING=True.
+    """
+    operation = models.CharField(max_length=50)
+    document_id = models.BigIntegerField(null=True, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    page_count = models.IntegerField(null=True, blank=True)
+    # Pico de memoria Python (tracemalloc) durante la operación, en bytes;
+    # None si otra operación medida se solapó y el pico no es fiable
+    tracemalloc_peak = models.BigIntegerField(null=True, blank=True)
+    # RSS del proceso antes y después, y pico de RSS del proceso al terminar, en bytes
+    rss_before = models.BigIntegerField()
+    rss_after = models.BigIntegerField()
+    peak_rss = models.BigIntegerField()
+    duration_ms = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['operation', 'created_at'])]
+
+    def __str__(self):
+        if self.tracemalloc_peak is None:
+            return f"{self.operation} (pico solapado)"
+        return f"{self.operation} ({self.tracemalloc_peak // (1024 * 1024)} MB)"
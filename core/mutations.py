@@ -0,0 +1,229 @@
+"""
+Protección de las operaciones que modifican un documento.
+
+- idempotent: las vistas mutadoras aceptan la cabecera Idempotency-Key.
+  La primera petición con una clave se ejecuta y su respuesta se guarda
+  (IdempotencyKey); los reintentos con la misma clave reciben la respuesta
+  guardada sin volver a descargar, estampar ni subir el PDF. Si la petición
+  original sigue en curso el reintento recibe 409 en lugar de duplicar el
+  trabajo.
+- document_operation: control de concurrencia optimista sobre Document.
+  Cada modificación incrementa Document.version; el cliente puede enviar la
+  versión que conoce en If-Match. Mientras dura una operación pesada el
+  documento queda reservado (locked_until) y cualquier otra operación
+  concurrente falla de inmediato con 409.
+"""
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import Document, IdempotencyKey
+
+logger = logging.getLogger('core')
+
+
+class DocumentConflict(Exception):
+    """El documento cambió o está ocupado por otra operación."""
+
+    def __init__(self, message, current_version=None, busy=False):
+        super().__init__(message)
+        self.current_version = current_version
+        self.busy = busy
+
+
+def conflict_response(error):
+    """Respuesta 409 para un DocumentConflict, con la versión actual del documento."""
+    response = JsonResponse(
+        {'status': 'error', 'message': str(error), 'version': error.current_version},
+        status=409,
+    )
+    if error.busy:
+        response['Retry-After'] = '5'
+    return response
+
+
+def expected_version(request):
+    """
+    Versión del documento que el cliente dice modificar (cabecera If-Match).
+
+    Acepta el número solo o entre comillas, como un ETag. Devuelve None si
+    el cliente no la envía.
+    """
+    value = request.headers.get('If-Match', '').strip().strip('"')
+    return int(value) if value.isdigit() else None
+
+
+@contextmanager
+def document_operation(document, expected_version=None):
+    """
+    Reserva el documento durante una operación pesada.
+
+    La reserva es un UPDATE condicional sobre la versión leída y un
+    locked_until vencido, así que solo una petición la obtiene; las demás
+    reciben DocumentConflict sin haber hecho ningún trabajo. La reserva se
+    libera al salir; commit_document() la libera al guardar el resultado.
+
+    Args:
+        document: Instancia de Document leída al inicio de la petición.
+        expected_version: Versión que el cliente espera modificar, o None.
+
+    Raises:
+        DocumentConflict: Si la versión no coincide o hay otra operación en curso.
+    """
+    if expected_version is not None and expected_version != document.version:
+        raise DocumentConflict('El documento fue modificado por otra operación. Recarga la página.', document.version)
+
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=settings.DOCUMENT_OPERATION_TIMEOUT)
+    claimed = Document.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        pk=document.pk,
+        version=document.version,
+    ).update(locked_until=locked_until)
+
+    if not claimed:
+        current_version = Document.objects.filter(pk=document.pk).values_list('version', flat=True).first()
+        if current_version != document.version:
+            raise DocumentConflict('El documento fue modificado por otra operación. Recarga la página.', current_version)
+        raise DocumentConflict('Ya hay otra operación en curso sobre este documento.', current_version, busy=True)
+
+    document.locked_until = locked_until
+    try:
+        yield document
+    finally:
+        # No-op si commit_document() ya liberó la reserva
+        Document.objects.filter(pk=document.pk, locked_until=locked_until).update(locked_until=None)
+
+
+def commit_document(document, **fields):
+    """
+    Guarda fields en el documento solo si nadie lo modificó desde que se leyó.
+
+    Incrementa la versión y libera la reserva en el mismo UPDATE.
+
+    Raises:
+        DocumentConflict: Si otra operación guardó antes.
+    """
+    updated = Document.objects.filter(pk=document.pk, version=document.version).update(
+        version=F('version') + 1,
+        locked_until=None,
+        **fields,
+    )
+    if not updated:
+        current_version = Document.objects.filter(pk=document.pk).values_list('version', flat=True).first()
+        raise DocumentConflict('El documento fue modificado por otra operación. Recarga la página.', current_version)
+
+    for name, value in fields.items():
+        setattr(document, name, value)
+    document.version += 1
+    document.locked_until = None
+
+
+def _request_hash(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _claim_key(request, key):
+    """
+    Registra la clave como en curso o devuelve la respuesta que corresponde
+    a un reintento. Devuelve (record, None) si la vista debe ejecutarse.
+    """
+    request_hash = _request_hash(request)
+    now = timezone.now()
+    expired = now - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    abandoned = now - timedelta(seconds=settings.DOCUMENT_OPERATION_TIMEOUT)
+
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user, key=key, path=request.path, request_hash=request_hash,
+                )
+            return record, None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+            if existing is None:
+                continue
+
+        if existing.created_at < expired or (existing.status_code is None and existing.created_at < abandoned):
+            # Clave caducada o de una petición que murió sin responder
+            IdempotencyKey.objects.filter(pk=existing.pk, created_at=existing.created_at).delete()
+            continue
+        if existing.request_hash != request_hash:
+            return None, JsonResponse(
+                {'status': 'error', 'message': 'La clave de idempotencia ya se usó con otra petición.'},
+                status=422,
+            )
+        if existing.status_code is None:
+            response = JsonResponse(
+                {'status': 'error', 'message': 'La petición original sigue en curso.'},
+                status=409,
+            )
+            response['Retry-After'] = '5'
+            return None, response
+
+        response = JsonResponse(existing.response_body, status=existing.status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return None, response
+
+    return None, JsonResponse({'status': 'error', 'message': 'No se pudo registrar la clave de idempotencia.'}, status=409)
+
+
+def idempotent(view):
+    """
+    Decorador para vistas JSON mutadoras que honra la cabecera Idempotency-Key.
+
+    Sin cabecera la vista se ejecuta como siempre. Solo se guardan las
+    respuestas 2xx: las vistas devuelven los fallos transitorios (almacenamiento,
+    conflictos) como 4xx/5xx y el cliente debe poder reintentar con la misma clave.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key', '').strip()
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > 255:
+            return JsonResponse({'status': 'error', 'message': 'Idempotency-Key demasiado larga.'}, status=400)
+
+        record, replay = _claim_key(request, key)
+        if replay is not None:
+            return replay
+
+        IdempotencyKey.objects.filter(
+            user=request.user,
+            created_at__lt=timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        ).delete()
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if not 200 <= response.status_code < 300:
+            record.delete()
+            return response
+        try:
+            record.response_body = json.loads(response.content)
+        except ValueError:
+            logger.warning(f"Respuesta no JSON en vista idempotente {request.path}; no se guarda")
+            record.delete()
+            return response
+        record.status_code = response.status_code
+        record.save(update_fields=['status_code', 'response_body'])
+        return response
+
+    return wrapper
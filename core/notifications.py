@@ -0,0 +1,208 @@
+"""
+Envío de notificaciones salientes (EmailJS) fuera del ciclo de la petición.
+
+La vista solo encola una fila OutboundEmail. process_outbox() la envía en
+segundo plano usando el transporte configurado en EMAIL_TRANSPORT, con
+timeouts explícitos y reintentos con backoff exponencial.
+"""
+import json
+import logging
+import os
+import random
+import threading
+from datetime import timedelta
+
+import urllib3
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboundEmail
+from .tasks import run_in_background, run_in_background_after
+
+logger = logging.getLogger('core')
+
+# Tiempo tras el cual una fila en 'sending' se considera abandonada (worker caído)
+STALE_LOCK = timedelta(minutes=5)
+
+# Temporizador del próximo reintento en este proceso (uno como máximo)
+_retry_timer = None
+_retry_due = None
+_retry_lock = threading.Lock()
+
+
+class TransportError(Exception):
+    """Error al entregar una notificación; el mensaje se reintentará."""
+
+
+class EmailJSTransport:
+    """
+    Transporte HTTP hacia la API de EmailJS.
+
+    Reutiliza un único PoolManager por proceso para mantener las conexiones
+    TLS abiertas entre envíos.
+    """
+    url = "https://api.emailjs.com/api/v1.0/email/send"
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def _get_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = urllib3.PoolManager(
+                    num_pools=1,
+                    maxsize=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                    timeout=urllib3.Timeout(
+                        connect=settings.EMAIL_CONNECT_TIMEOUT,
+                        read=settings.EMAIL_READ_TIMEOUT,
+                    ),
+                    # Los reintentos los gestiona la bandeja de salida con backoff
+                    retries=False,
+                )
+            return cls._pool
+
+    def send(self, to_email, template_params):
+        data = {
+            'service_id': os.getenv('EMAILJS_SERVICE_ID'),
+            'template_id': os.getenv('EMAILJS_TEMPLATE_ID'),
+            'user_id': os.getenv('EMAILJS_PUBLIC_KEY'),
+            'accessToken': os.getenv('EMAILJS_PRIVATE_KEY'),
+            'template_params': {'email': to_email, **template_params},
+        }
+        try:
+            response = self._get_pool().request(
+                'POST',
+                self.url,
+                body=json.dumps(data).encode('utf-8'),
+                headers={
+                    'Content-Type': 'application/json',
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                },
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise TransportError(f"Error de conexión con EmailJS: {e}") from e
+
+        res_body = response.data.decode('utf-8', errors='replace')
+        if response.status >= 400:
+            raise TransportError(f"EmailJS HTTP Error {response.status}: {res_body}")
+        return res_body
+
+
+class StubTransport:
+    """
+    Transporte local para tests y pruebas de carga: no sale a la red y
+    guarda los mensajes en memoria.
+    """
+    sent = []
+
+    def send(self, to_email, template_params):
+        StubTransport.sent.append({'email': to_email, **template_params})
+        return 'OK'
+
+
+def get_transport():
+    return import_string(settings.EMAIL_TRANSPORT)()
+
+
+def enqueue_email(to_email, template_params):
+    """
+    Encola una notificación y programa su envío al confirmar la transacción.
+    """
+    message = OutboundEmail.objects.create(to_email=to_email, template_params=template_params)
+    transaction.on_commit(lambda: run_in_background(process_outbox))
+    return message
+
+
+def _retry_delay(attempts):
+    base = settings.EMAIL_RETRY_BASE_SECONDS
+    delay = min(base * (2 ** (attempts - 1)), settings.EMAIL_RETRY_MAX_SECONDS)
+    # Jitter para que los reintentos de varios workers no coincidan
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _due_filter(now):
+    """Mensajes pendientes vencidos o bloqueados por un worker que no terminó."""
+    return (
+        Q(status='pending', next_attempt_at__lte=now)
+        | Q(status='sending', locked_at__lt=now - STALE_LOCK)
+    )
+
+
+def process_outbox(limit=50, schedule_retry=True):
+    """
+    Envía los mensajes pendientes cuyo próximo intento ya venció.
+
+    Cada fila se reclama con un UPDATE condicional para que dos workers no
+    envíen el mismo correo. Si quedan reintentos programados, se agenda una
+    nueva pasada para cuando venza el más próximo.
+
+    Returns:
+        int: Número de mensajes enviados correctamente.
+    """
+    transport = get_transport()
+    sent = 0
+    now = timezone.now()
+
+    due = OutboundEmail.objects.filter(_due_filter(now)).order_by('next_attempt_at')
+    for message_pk in due.values_list('pk', flat=True)[:limit]:
+        claimed = OutboundEmail.objects.filter(_due_filter(now), pk=message_pk).update(
+            status='sending', locked_at=now,
+        )
+        if not claimed:
+            continue
+
+        message = OutboundEmail.objects.get(pk=message_pk)
+        message.attempts += 1
+        try:
+            transport.send(message.to_email, message.template_params)
+        except Exception as e:
+            message.last_error = str(e)
+            if message.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                message.status = 'failed'
+                # Sin más reintentos el enlace de restablecimiento ya no se usará: no se conserva
+                message.template_params = {}
+                logger.error(f"Correo {message.pk} descartado tras {message.attempts} intentos: {e}")
+            else:
+                message.status = 'pending'
+                message.next_attempt_at = timezone.now() + timedelta(seconds=_retry_delay(message.attempts))
+                logger.warning(f"Fallo enviando correo {message.pk} (intento {message.attempts}): {e}")
+        else:
+            message.status = 'sent'
+            message.sent_at = timezone.now()
+            message.last_error = ''
+            # El enlace de restablecimiento es un secreto: no se conserva tras el envío
+            message.template_params = {}
+            sent += 1
+            logger.info(f"Correo {message.pk} enviado correctamente vía {type(transport).__name__}")
+        message.locked_at = None
+        message.save()
+
+    if schedule_retry:
+        _schedule_next_retry()
+    return sent
+
+
+def _schedule_next_retry():
+    """Programa una única pasada para el próximo reintento pendiente del proceso."""
+    global _retry_timer, _retry_due
+
+    next_retry = (
+        OutboundEmail.objects.filter(status='pending')
+        .order_by('next_attempt_at')
+        .values_list('next_attempt_at', flat=True)
+        .first()
+    )
+    if next_retry is None:
+        return
+
+    with _retry_lock:
+        if _retry_timer is not None and _retry_timer.is_alive() and _retry_due <= next_retry:
+            return
+        if _retry_timer is not None:
+            _retry_timer.cancel()
+        delay = max((next_retry - timezone.now()).total_seconds(), 0)
+        _retry_timer = run_in_background_after(delay, process_outbox)
+        _retry_due = next_retry
@@ -0,0 +1,247 @@
+"""
+Operaciones de páginas sobre documentos: extraer, dividir y unir.
+
+La vista solo crea un PageOperation y lo encola con run_in_background;
+el trabajo abre los originales con open_pdf (por ruta, sin copiarlos a
+memoria), construye los PDF con pdf_utils.assemble_pdf y crea los
+documentos nuevos. Los documentos de origen no se modifican. Si el worker
+muere a mitad, la operación queda 'running': el comando
+run_page_operations la retoma pasado PAGE_OPERATION_TIMEOUT.
+
+Los rangos se escriben como en el diálogo de impresión: "1-3, 5, 8-10"
+(base 1). Al extraer, todos los rangos forman un único documento; al
+dividir, cada rango es un documento nuevo.
+"""
+import logging
+import re
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Document, PageOperation
+from .pdf_utils import assemble_pdf, open_pdf
+from .search import index_document
+from .tasks import run_in_background
+
+logger = logging.getLogger('core')
+
+_RANGE_RE = re.compile(r'^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$')
+
+
+def parse_page_ranges(text):
+    """
+    Convierte "1-3, 5" en [(1, 3), (5, 5)].
+
+    Raises:
+        ValueError: Si el texto no tiene el formato esperado.
+    """
+    if text is not None and not isinstance(text, str):
+        raise ValueError('Los rangos de páginas deben ser texto, p. ej. "1-3, 5".')
+    ranges = []
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        match = _RANGE_RE.match(part)
+        if not match:
+            raise ValueError(f"Rango de páginas no válido: '{part.strip()}'.")
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        if start < 1 or end < start:
+            raise ValueError(f"Rango de páginas no válido: '{part.strip()}'.")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError('Indica al menos una página.')
+    return ranges
+
+
+def _check_bounds(ranges, page_count):
+    for start, end in ranges:
+        if end > page_count:
+            raise ValueError(f"El documento solo tiene {page_count} páginas.")
+
+
+def _create_document(owner, title, pdf_bytes, created):
+    """
+    Crea un documento nuevo con el PDF resultante y lo indexa para la búsqueda.
+
+    El documento se añade a created en cuanto existe, para poder deshacerlo
+    si la operación falla después.
+    """
+    document = Document(owner=owner, title=title[:200], status='uploaded')
+    filename = f"{slugify(title)[:100] or 'documento'}.pdf"
+    document.original_file.save(filename, ContentFile(pdf_bytes), save=False)
+    try:
+        document.save()
+    except Exception:
+        document.original_file.delete(save=False)
+        raise
+    created.append(document)
+    try:
+        index_document(document.pk)
+    except Exception as e:
+        logger.warning(f"No se pudo indexar el documento {document.pk}: {e}")
+
+
+def _discard(documents):
+    """
+    Borra los documentos creados por una operación fallida y sus archivos.
+
+    Returns:
+        list: Ids de los documentos que no se pudieron borrar.
+    """
+    remaining = []
+    for document in documents:
+        pk, file_name = document.pk, document.original_file.name
+        try:
+            document.delete()
+        except Exception as e:
+            logger.error(f"No se pudo deshacer el documento {pk}: {e}")
+            remaining.append(pk)
+            continue
+        try:
+            document.original_file.storage.delete(file_name)
+        except Exception as e:
+            # Ya no lo referencia ninguna fila: gc_storage lo borrará
+            logger.warning(f"No se pudo borrar el archivo {file_name}: {e}")
+    return remaining
+
+
+def _extract(operation, source, created):
+    ranges = [tuple(r) for r in operation.params['ranges']]
+    with open_pdf(source.pdf_source) as pdf_doc:
+        _check_bounds(ranges, pdf_doc.page_count)
+        pdf_bytes = assemble_pdf((pdf_doc, start - 1, end - 1) for start, end in ranges)
+    title = operation.params.get('title') or f"{source.title} (págs. {operation.params['ranges_text']})"
+    _create_document(operation.owner, title, pdf_bytes, created)
+
+
+def _split(operation, source, created):
+    ranges = [tuple(r) for r in operation.params['ranges']]
+    with open_pdf(source.pdf_source) as pdf_doc:
+        _check_bounds(ranges, pdf_doc.page_count)
+        for start, end in ranges:
+            pdf_bytes = assemble_pdf([(pdf_doc, start - 1, end - 1)])
+            pages = f"{start}" if start == end else f"{start}-{end}"
+            _create_document(operation.owner, f"{source.title} (págs. {pages})", pdf_bytes, created)
+
+
+def _merge(operation, sources, created):
+    with ExitStack() as stack:
+        pdf_docs = [stack.enter_context(open_pdf(source.pdf_source)) for source in sources]
+        pdf_bytes = assemble_pdf((pdf_doc, 0, pdf_doc.page_count - 1) for pdf_doc in pdf_docs)
+    title = operation.params.get('title') or ' + '.join(source.title for source in sources)
+    _create_document(operation.owner, title, pdf_bytes, created)
+
+
+def _stale_filter(now):
+    """Operaciones que nadie empezó o que un worker tomó y no terminó en PAGE_OPERATION_TIMEOUT."""
+    cutoff = now - timedelta(seconds=settings.PAGE_OPERATION_TIMEOUT)
+    return Q(status='pending', created_at__lt=cutoff) | Q(status='running', claimed_at__lt=cutoff)
+
+
+def _finish(operation_pk, claimed_at, created, **fields):
+    """
+    Guarda el resultado si la operación sigue siendo de este worker.
+
+    Si otro la retomó por abandonada, los documentos creados aquí sobran y se borran.
+    """
+    finished = PageOperation.objects.filter(pk=operation_pk, status='running', claimed_at=claimed_at).update(
+        finished_at=timezone.now(), **fields,
+    )
+    if not finished:
+        logger.warning(f"La operación de páginas {operation_pk} la retomó otro worker; se descarta este resultado")
+        _discard(created)
+
+
+def _fail(operation_pk, claimed_at, error, created):
+    # Lo que no se pudo borrar queda en result_ids para que el usuario lo vea
+    _finish(operation_pk, claimed_at, [], status='failed', error=error, result_ids=_discard(created))
+
+
+def run_page_operation(operation_pk):
+    """
+    Ejecuta un PageOperation pendiente (trabajo en segundo plano).
+
+    También retoma una operación 'running' abandonada: la que se tomó hace
+    más de PAGE_OPERATION_TIMEOUT segundos sin llegar a terminar.
+    """
+    now = timezone.now()
+    claimable = Q(status='pending') | _stale_filter(now)
+    claimed = PageOperation.objects.filter(claimable, pk=operation_pk).update(status='running', claimed_at=now)
+    if not claimed:
+        return
+    operation = PageOperation.objects.select_related('owner').get(pk=operation_pk)
+
+    document_ids = operation.params['documents']
+    sources = {
+        document.pk: document
+        for document in Document.objects.filter(pk__in=document_ids, owner=operation.owner, is_active=True)
+    }
+    created = []
+    try:
+        if len(sources) != len(set(document_ids)):
+            raise ValueError('Alguno de los documentos ya no está disponible.')
+        if operation.kind == 'extract':
+            _extract(operation, sources[document_ids[0]], created)
+        elif operation.kind == 'split':
+            _split(operation, sources[document_ids[0]], created)
+        else:
+            _merge(operation, [sources[pk] for pk in document_ids], created)
+    except ValueError as e:
+        _fail(operation_pk, now, str(e), created)
+        return
+    except Exception as e:
+        logger.error(f"Error en la operación de páginas {operation_pk}: {e}", exc_info=True)
+        _fail(operation_pk, now, 'No se pudo procesar el documento.', created)
+        return
+
+    _finish(operation_pk, now, created, status='done', result_ids=[document.pk for document in created])
+    logger.info(f"Operación de páginas {operation_pk} ({operation.kind}): {len(created)} documentos creados")
+
+
+def resume_stale_page_operations(limit=50):
+    """
+    Retoma las operaciones abandonadas (ver _stale_filter), p. ej. tras reiniciar un worker.
+
+    Returns:
+        int: Operaciones retomadas.
+    """
+    stale = PageOperation.objects.filter(_stale_filter(timezone.now())).order_by('created_at')
+    operation_pks = list(stale.values_list('pk', flat=True)[:limit])
+    for operation_pk in operation_pks:
+        logger.warning(f"Retomando la operación de páginas abandonada {operation_pk}")
+        run_page_operation(operation_pk)
+    return len(operation_pks)
+
+
+def start_page_operation(owner, kind, documents, ranges_text=None, title=''):
+    """
+    Valida los parámetros, crea el PageOperation y lo encola.
+
+    Args:
+        owner: Usuario propietario de los documentos.
+        kind (str): 'extract', 'split' o 'merge'.
+        documents (list): Documentos de origen, ya filtrados por propietario y en orden.
+        ranges_text (str): Rangos de páginas (extraer y dividir).
+        title (str): Título del documento resultante (extraer y unir).
+
+    Raises:
+        ValueError: Si el título o los rangos no son válidos o hay demasiadas partes.
+    """
+    if title is not None and not isinstance(title, str):
+        raise ValueError('El título debe ser texto.')
+    params = {'documents': [document.pk for document in documents], 'title': (title or '').strip()[:200]}
+    if kind in ('extract', 'split'):
+        params['ranges'] = parse_page_ranges(ranges_text)
+        if kind == 'split' and len(params['ranges']) > settings.PAGE_OPERATION_MAX_DOCUMENTS:
+            raise ValueError(f"Como máximo se puede dividir en {settings.PAGE_OPERATION_MAX_DOCUMENTS} documentos.")
+        params['ranges_text'] = ranges_text.strip()
+
+    operation = PageOperation.objects.create(owner=owner, kind=kind, params=params)
+    run_in_background(run_page_operation, operation.pk)
+    return operation
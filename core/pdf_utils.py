@@ -0,0 +1,188 @@
+"""
+Utilidades de PDF compartidas por las vistas y los trabajos en segundo plano.
+"""
+import io
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import fitz
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+
+try:
+    import pikepdf
+except ImportError:  # pikepdf es opcional: sin él no se linealiza
+    pikepdf = None
+
+logger = logging.getLogger('core')
+
+# Tamaño de los bloques al volcar un archivo remoto a disco
+_SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def _local_path(field_file):
+    """Ruta local del archivo si el storage la tiene (FileSystemStorage), si no None."""
+    try:
+        path = field_file.storage.path(field_file.name)
+    except NotImplementedError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+@contextmanager
+def open_pdf(source, info=None):
+    """
+    Abre un PDF con PyMuPDF sin copiarlo entero a memoria Python.
+
+    - FieldFile en un storage local: MuPDF lo abre directamente por su ruta.
+    - FieldFile en un storage remoto (MinIO/S3): se vuelca por bloques a un
+      archivo temporal en PDF_SPOOL_DIR y MuPDF lo abre por ruta; el
+      temporal se borra al cerrar.
+    - bytes u objeto tipo archivo: se abre desde memoria, como antes.
+
+    El documento se cierra siempre al salir del bloque.
+
+    Args:
+        source: FieldFile, bytes u objeto tipo archivo con el PDF.
+        info (dict): Opcional; se completa con file_size y page_count
+            (por ejemplo, el dict de profile_memory).
+
+    Yields:
+        fitz.Document: Documento abierto.
+    """
+    spooled_path = None
+    try:
+        if isinstance(source, FieldFile):
+            path = _local_path(source)
+            if path is None:
+                with tempfile.NamedTemporaryFile(
+                    prefix='pdf-', suffix='.pdf', dir=settings.PDF_SPOOL_DIR, delete=False,
+                ) as spool:
+                    spooled_path = spool.name
+                    with source.open('rb') as remote:
+                        shutil.copyfileobj(remote, spool, _SPOOL_CHUNK_SIZE)
+                path = spooled_path
+            file_size = os.path.getsize(path)
+            pdf_doc = fitz.open(path, filetype="pdf")
+        else:
+            data = source.read() if hasattr(source, 'read') else source
+            file_size = len(data)
+            pdf_doc = fitz.open(stream=data, filetype="pdf")
+
+        if info is not None:
+            info['file_size'] = file_size
+            info['page_count'] = pdf_doc.page_count
+        try:
+            yield pdf_doc
+        finally:
+            pdf_doc.close()
+    finally:
+        if spooled_path:
+            os.unlink(spooled_path)
+
+
+def normalize_pdf(source):
+    """
+    Reescribe un PDF en una forma limpia y rápida de abrir.
+
+    Al abrirlo MuPDF reconstruye la tabla xref si está dañada; al guardarlo
+    se escribe una xref nueva, se eliminan objetos sin uso (garbage=3), se
+    normalizan los content streams (clean) y todos los streams quedan
+    comprimidos con deflate. Así la reparación se paga una sola vez.
+
+    Args:
+        source: Contenido del PDF (bytes) o FieldFile (ver open_pdf).
+
+    Returns:
+        tuple: (bytes del PDF normalizado, True si MuPDF tuvo que repararlo).
+    """
+    with open_pdf(source) as doc:
+        repaired = doc.is_repaired
+        return doc.tobytes(garbage=3, clean=True, deflate=True), repaired
+
+
+def optimize_pdf(source):
+    """
+    Prepara un PDF para "vista web rápida".
+
+    1. PyMuPDF elimina objetos sin uso y deduplica streams idénticos (garbage=4).
+    2. qpdf (vía pikepdf) agrupa los objetos en object streams comprimidos y
+       linealiza el archivo, de modo que el visor puede mostrar la primera
+       página con una petición de rango sin descargar el documento completo.
+
+    MuPDF ya no soporta la linealización, por eso se delega en qpdf. Si
+    pikepdf no está instalado se devuelve el PDF compactado sin linealizar.
+
+    Args:
+        source: Contenido del PDF (bytes) o FieldFile (ver open_pdf).
+
+    Returns:
+        bytes: PDF optimizado.
+    """
+    with open_pdf(source) as doc:
+        compact = doc.tobytes(garbage=4, deflate=True, use_objstms=pikepdf is None)
+
+    if pikepdf is None:
+        logger.warning("pikepdf no está instalado: el PDF se guarda sin linealizar.")
+        return compact
+
+    output = io.BytesIO()
+    with pikepdf.open(io.BytesIO(compact)) as pdf:
+        pdf.save(
+            output,
+            linearize=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            compress_streams=True,
+        )
+    return output.getvalue()
+
+
+def extract_pages(source_doc, from_page, to_page=None):
+    """
+    Crea un PDF independiente con las páginas [from_page, to_page] (base 0).
+
+    Args:
+        source_doc: Documento fitz abierto de origen.
+        from_page (int): Primera página (base 0).
+        to_page (int): Última página incluida (base 0). Por defecto from_page.
+
+    Returns:
+        bytes: PDF con las páginas extraídas.
+    """
+    if to_page is None:
+        to_page = from_page
+    return assemble_pdf([(source_doc, from_page, to_page)])
+
+
+def assemble_pdf(parts):
+    """
+    Crea un PDF con los rangos de páginas indicados, en orden.
+
+    insert_pdf copia una sola vez los recursos (fuentes, imágenes) que
+    comparten las páginas copiadas de un mismo documento, también entre
+    llamadas sucesivas con el mismo origen; garbage=4 elimina además los
+    streams idénticos que vengan de documentos distintos. Las fuentes se
+    reducen a los glifos usados (subset), de modo que el resultado solo
+    pesa lo que pesan esas páginas.
+
+    Args:
+        parts: Iterable de (documento fitz abierto, primera página, última página), base 0.
+
+    Returns:
+        bytes: PDF resultante.
+    """
+    output_doc = fitz.open()
+    try:
+        for source_doc, from_page, to_page in parts:
+            output_doc.insert_pdf(source_doc, from_page=from_page, to_page=to_page)
+        try:
+            output_doc.subset_fonts()
+        except Exception as e:
+            # Algunas fuentes (Type3, CID dañadas) no se pueden reducir: se copian completas
+            logger.warning(f"No se pudieron reducir las fuentes del PDF: {e}")
+        return output_doc.tobytes(garbage=4, deflate=True)
+    finally:
+        output_doc.close()
@@ -0,0 +1,124 @@
+"""
+Búsqueda de texto completo sobre el título y el contenido de los documentos.
+
+- SQLite: tabla FTS5 core_documentcontent_fts, ranking bm25.
+- PostgreSQL: columna generada search_vector (tsvector) con índice GIN, ranking ts_rank.
+- Otros motores: LIKE sobre el título, sin ranking.
+
+El texto se extrae con PyMuPDF en segundo plano al subir el documento
+(index_document) y se guarda en DocumentContent; el índice lo mantiene la
+propia base de datos (triggers o columna generada).
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Document, DocumentContent
+from .pdf_utils import open_pdf
+
+logger = logging.getLogger('core')
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def extract_text(source, max_chars=None):
+    """Concatena el texto de todas las páginas, hasta max_chars caracteres (source: ver open_pdf)."""
+    max_chars = max_chars or settings.SEARCH_MAX_TEXT_CHARS
+    with open_pdf(source) as pdf_doc:
+        parts = []
+        total = 0
+        for page in pdf_doc:
+            text = page.get_text()
+            parts.append(text)
+            total += len(text)
+            if total >= max_chars:
+                break
+        return ''.join(parts)[:max_chars]
+
+
+def index_document(document_pk):
+    """Extrae el texto del original y actualiza DocumentContent (trabajo en segundo plano)."""
+    document = Document.objects.get(pk=document_pk)
+    text = extract_text(document.pdf_source)
+    DocumentContent.objects.update_or_create(
+        document=document, defaults={'title': document.title, 'text': text},
+    )
+    logger.info(f"Documento {document_pk} indexado ({len(text)} caracteres)")
+
+
+def _fts5_query(query):
+    # Cada palabra como término entre comillas con prefijo: evita errores de
+    # sintaxis de FTS5 con caracteres especiales y busca mientras se escribe.
+    words = _WORD_RE.findall(query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def ranked_document_ids(query, owner_id=None, limit=None):
+    """
+    Devuelve los ids de Document que coinciden con query, del más relevante al menos.
+
+    Returns:
+        list | None: Ids ordenados, o None si el motor no tiene índice de texto completo.
+    """
+    limit = limit or settings.SEARCH_MAX_RESULTS
+    # Los eliminados se descartan antes del LIMIT para que no ocupen resultados
+    owner_sql = ' AND d.is_active = %s' + (' AND d.owner_id = %s' if owner_id is not None else '')
+    owner_params = [True] + ([owner_id] if owner_id is not None else [])
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT c.document_id FROM core_documentcontent_fts f "
+            "JOIN core_documentcontent c ON c.id = f.rowid "
+            "JOIN core_document d ON d.id = c.document_id "
+            "WHERE core_documentcontent_fts MATCH %s" + owner_sql +
+            # El título pesa 10 veces más que el contenido
+            " ORDER BY bm25(core_documentcontent_fts, 10.0, 1.0) LIMIT %s"
+        )
+        params = [match, *owner_params, limit]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            "SELECT c.document_id FROM core_documentcontent c "
+            "JOIN core_document d ON d.id = c.document_id, "
+            "websearch_to_tsquery('spanish', %s) q "
+            "WHERE c.search_vector @@ q" + owner_sql +
+            " ORDER BY ts_rank(c.search_vector, q) DESC LIMIT %s"
+        )
+        params = [query, *owner_params, limit]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_documents(queryset, query, owner_id=None):
+    """
+    Filtra queryset por la búsqueda y lo ordena por relevancia.
+
+    Los documentos sin DocumentContent (extracción pendiente en segundo plano
+    o fallida) se buscan solo por título y aparecen después de los indexados.
+    """
+    ids = ranked_document_ids(query, owner_id=owner_id)
+    if ids is None:
+        return queryset.filter(title__icontains=query)
+    not_indexed = Q(content__isnull=True, title__icontains=query)
+    if not ids:
+        return queryset.filter(not_indexed)
+    ranking = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        default=Value(len(ids)), output_field=IntegerField(),
+    )
+    return queryset.filter(Q(pk__in=ids) | not_indexed).annotate(search_rank=ranking).order_by('search_rank', '-created_at')
+
+
+def sync_title(sender, instance, created, **kwargs):
+    """post_save de Document: mantiene el título indexado si se edita (p. ej. desde el admin)."""
+    if not created:
+        DocumentContent.objects.filter(document=instance).exclude(title=instance.title).update(title=instance.title)
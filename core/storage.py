@@ -0,0 +1,246 @@
+"""
+Capa de resiliencia sobre el storage de archivos (MinIO/S3).
+
+Sin ella, un MinIO lento bloquea cada open()/save() hasta que gunicorn
+mata el worker (120 s) y la aplicación entera deja de responder.
+
+- Timeouts de conexión y lectura acotados (STORAGE_CONNECT_TIMEOUT,
+  STORAGE_READ_TIMEOUT); botocore no reintenta por su cuenta.
+- Reintentos con backoff exponencial y jitter solo para operaciones
+  idempotentes (lecturas, exists, size, listdir, delete). Las escrituras no
+  se reintentan: el contenido ya puede estar consumido.
+- Circuit breaker por proceso: tras STORAGE_BREAKER_THRESHOLD fallos
+  transitorios seguidos se deja de llamar al backend durante
+  STORAGE_BREAKER_RESET_SECONDS y cada operación falla de inmediato con
+  StorageUnavailable. Pasado ese tiempo se deja pasar una operación de
+  prueba; si funciona, el circuito se cierra.
+
+FaultyFileSystemStorage (STORAGE_BACKEND=faulty) es un storage local que
+inyecta latencia y errores para probar este comportamiento sin MinIO
+(ver el comando bench_storage_faults).
+"""
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+logger = logging.getLogger('core')
+
+
+class StorageUnavailable(Exception):
+    """El almacenamiento de archivos no responde; la operación no se intentó o agotó los reintentos."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sencillo, seguro entre hilos.
+
+    closed: las llamadas pasan. open: fallan sin llamar al backend hasta
+    reset_timeout. half-open: pasa una sola llamada de prueba.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Lanza StorageUnavailable si el circuito no deja pasar la llamada."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        raise StorageUnavailable(
+            f"El almacenamiento de archivos no está disponible; se reintentará en {max(remaining, 0):.0f} s."
+        )
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuito de {self.name} cerrado: el backend vuelve a responder")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            trial_failed = self._trial_running
+            self._trial_running = False
+            if trial_failed or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                logger.error(
+                    f"Circuito de {self.name} abierto tras {self._failures} fallos; "
+                    f"fallo rápido durante {self.reset_timeout} s"
+                )
+
+
+def is_transient(error):
+    """True si el error es de red/backend y tiene sentido reintentar o contarlo en el circuito."""
+    if isinstance(error, FileNotFoundError):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        from botocore import exceptions as boto_exceptions
+    except ImportError:
+        return False
+    if isinstance(error, (
+        boto_exceptions.ConnectionError,
+        boto_exceptions.HTTPClientError,
+    )):
+        return True
+    if isinstance(error, boto_exceptions.ClientError):
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        code = error.response.get('Error', {}).get('Code', '')
+        return status >= 500 or code in ('SlowDown', 'RequestTimeout', 'ServiceUnavailable')
+    return False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Circuit breaker compartido por todas las instancias del mismo storage en el proceso."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.STORAGE_BREAKER_THRESHOLD,
+                reset_timeout=settings.STORAGE_BREAKER_RESET_SECONDS,
+            )
+        return _breakers[name]
+
+
+class ResilientStorageMixin:
+    """
+    Añade reintentos y circuit breaker a un storage de Django.
+
+    Se combina con la clase del backend: class X(ResilientStorageMixin, S3Storage).
+    """
+    breaker_name = 'storage'
+
+    @property
+    def breaker(self):
+        return get_breaker(self.breaker_name)
+
+    def _call(self, operation, func, *args, retry=True):
+        attempts = settings.STORAGE_MAX_ATTEMPTS if retry else 1
+        for attempt in range(1, attempts + 1):
+            self.breaker.before_call()
+            try:
+                self._before_backend_call(operation)
+                result = func(*args)
+            except Exception as e:
+                if not is_transient(e):
+                    # Errores del propio archivo (no existe, permisos...) no afectan al circuito
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    logger.error(f"Storage {operation} falló tras {attempt} intentos: {e}")
+                    raise StorageUnavailable(
+                        "El almacenamiento de archivos no responde. Inténtalo de nuevo en unos minutos."
+                    ) from e
+                # Backoff exponencial con jitter completo, como en la bandeja de correo
+                delay = random.uniform(0, settings.STORAGE_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+                logger.warning(f"Storage {operation} falló (intento {attempt}/{attempts}): {e}; reintento en {delay:.2f} s")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def _before_backend_call(self, operation):
+        """Punto de extensión antes de cada llamada al backend (inyección de fallos)."""
+
+    def _open(self, name, mode='rb'):
+        return self._call('open', self._open_and_load, name, mode, retry='w' not in mode)
+
+    def _open_and_load(self, name, mode):
+        return super()._open(name, mode)
+
+    def _save(self, name, content):
+        return self._call('save', super()._save, name, content, retry=False)
+
+    def delete(self, name):
+        return self._call('delete', super().delete, name)
+
+    def exists(self, name):
+        return self._call('exists', super().exists, name)
+
+    def size(self, name):
+        return self._call('size', super().size, name)
+
+    def listdir(self, path):
+        return self._call('listdir', super().listdir, path)
+
+
+try:
+    from botocore.config import Config
+    from storages.backends.s3 import S3Storage
+except ImportError:  # django-storages[s3] solo hace falta con STORAGE_BACKEND=s3
+    S3Storage = None
+
+if S3Storage is not None:
+    class ResilientS3Storage(ResilientStorageMixin, S3Storage):
+        """S3Storage (MinIO) con timeouts acotados, reintentos y circuit breaker."""
+        breaker_name = 'minio'
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.client_config = self.client_config.merge(Config(
+                connect_timeout=settings.STORAGE_CONNECT_TIMEOUT,
+                read_timeout=settings.STORAGE_READ_TIMEOUT,
+                # Los reintentos los hace ResilientStorageMixin con backoff y jitter
+                retries={'total_max_attempts': 1, 'mode': 'standard'},
+            ))
+
+        def _open_and_load(self, name, mode):
+            # S3File descarga el objeto en la primera lectura, fuera de _open;
+            # se fuerza aquí para que la descarga quede dentro de los reintentos.
+            file = super()._open_and_load(name, mode)
+            if 'r' in mode:
+                file.file
+            return file
+
+
+class FaultyFileSystemStorage(ResilientStorageMixin, FileSystemStorage):
+    """
+    Storage local que simula un MinIO inestable (STORAGE_BACKEND=faulty).
+
+    Cada operación espera STORAGE_FAULT_LATENCY segundos y falla con
+    probabilidad STORAGE_FAULT_RATE (ConnectionError o TimeoutError).
+    """
+    breaker_name = 'faulty'
+
+    def _before_backend_call(self, operation):
+        latency = settings.STORAGE_FAULT_LATENCY
+        if latency:
+            time.sleep(latency)
+        if random.random() < settings.STORAGE_FAULT_RATE:
+            error = random.choice((ConnectionError, TimeoutError))
+            raise error(f"Fallo inyectado en {operation}")
@@ -0,0 +1,134 @@
+"""
+Ejecución de trabajos en segundo plano dentro del proceso de gunicorn.
+
+No hay un broker de colas en el despliegue, así que los trabajos pesados
+que no necesitan bloquear la respuesta se ejecutan en un ThreadPoolExecutor
+compartido por el worker. Cada trabajo cierra su conexión a la base de
+datos al terminar para no dejar conexiones huérfanas por hilo.
+"""
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger('core')
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+            thread_name_prefix='firma-bg',
+        )
+    return _executor
+
+
+def _run_job(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Error en trabajo en segundo plano {func.__name__}: {e}", exc_info=True)
+        raise
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Encola func(*args, **kwargs) en el pool de segundo plano.
+
+    Con BACKGROUND_TASKS_EAGER=True (tests, comandos de gestión) se ejecuta
+    en el mismo hilo y de forma síncrona.
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        return func(*args, **kwargs)
+    # Se copia el contexto para que los logs del trabajo conserven el id de la petición
+    context = contextvars.copy_context()
+    return _get_executor().submit(context.run, _run_job, func, args, kwargs)
+
+
+def run_in_background_after(delay, func, *args, **kwargs):
+    """
+    Encola func en el pool de segundo plano dentro de delay segundos.
+
+    Devuelve el Timer para poder cancelarlo. En modo eager no se programa
+    nada: los reintentos quedan para el siguiente comando de gestión.
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        return None
+    timer = threading.Timer(delay, run_in_background, args=(func, *args), kwargs=kwargs)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+# --- Trabajos ---
+def optimize_stored_output(document_pk, file_name):
+    """
+    Optimiza (linealiza y compacta) el archivo firmado ya guardado de un documento.
+
+    Solo reemplaza signed_file si sigue apuntando a file_name, para no pisar
+    el resultado de una operación posterior sobre el mismo documento. El
+    contenido es equivalente, así que la versión no cambia: un If-Match
+    obtenido antes de la optimización sigue siendo válido.
+    """
+    from .models import Document
+    from .pdf_utils import optimize_pdf
+
+    document = Document.objects.get(pk=document_pk)
+    if document.signed_file.name != file_name:
+        return
+
+    optimized = optimize_pdf(document.signed_file)
+
+    storage = document.signed_file.storage
+    new_name = storage.save(file_name, ContentFile(optimized))
+    updated = Document.objects.filter(pk=document_pk, signed_file=file_name).update(signed_file=new_name)
+    if not updated:
+        # Otra operación cambió el archivo mientras optimizábamos
+        storage.delete(new_name)
+        return
+    logger.info(f"Salida optimizada para el documento {document_pk}: {new_name}")
+
+
+def normalize_document(document_pk):
+    """
+    Genera la copia de trabajo normalizada del original (ver pdf_utils.normalize_pdf).
+
+    Si el documento ya tiene copia de trabajo no hace nada; si otra
+    ejecución la guarda antes, se descarta el archivo propio.
+    """
+    import os
+
+    from django.db.models import Q
+
+    from .models import Document
+    from .pdf_utils import normalize_pdf
+
+    document = Document.objects.get(pk=document_pk)
+    if document.working_file:
+        return
+
+    pdf_bytes, repaired = normalize_pdf(document.original_file)
+
+    field = Document._meta.get_field('working_file')
+    name = field.generate_filename(document, os.path.basename(document.original_file.name))
+    name = field.storage.save(name, ContentFile(pdf_bytes), max_length=field.max_length)
+    updated = Document.objects.filter(
+        Q(working_file='') | Q(working_file__isnull=True), pk=document_pk,
+    ).update(working_file=name)
+    if not updated:
+        field.storage.delete(name)
+        return
+    logger.info(
+        f"Copia de trabajo del documento {document_pk}: {name}"
+        + (" (el original estaba dañado y se reparó)" if repaired else "")
+    )
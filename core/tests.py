@@ -1,3 +1,642 @@
-from django.test import TestCase
+import atexit
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import storage as resilient_storage
+from .batch_upload import BatchUploadError, process_batch
+from .loadtest.journeys import make_pdf
+from .log import JsonFormatter, QueueListenerHandler, RequestIdFilter
+from .memory_profile import profile_memory
+from .models import Document, DocumentContent, IdempotencyKey, MemoryProfile, OutboundEmail, PageOperation
+from .mutations import (
+    DocumentConflict, _claim_key, commit_document, document_operation, expected_version, idempotent,
+)
+from .notifications import TransportError, process_outbox
+from .page_operations import resume_stale_page_operations
+from .pdf_utils import assemble_pdf
+from .search import search_documents
+from .tasks import optimize_stored_output
+
+
+class TemporaryMediaMixin:
+    """Archivos en un MEDIA_ROOT temporal con FileSystemStorage, sea cual sea STORAGE_BACKEND."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='firma-tests-')
+        cls._media_override = override_settings(
+            MEDIA_ROOT=cls.media_root,
+            STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'}},
+        )
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+
+class ConcurrentWriteTests(TransactionTestCase):
+    """Escrituras en paralelo sobre la base de datos de pruebas (WAL + BEGIN IMMEDIATE en SQLite)."""
+
+    THREADS = 8
+    WRITES = 25
+
+    def test_parallel_document_writes_do_not_lock(self):
+        owner = User.objects.create_user('writer')
+        errors = []
+
+        def worker(worker_id):
+            try:
+                for i in range(self.WRITES):
+                    # Creación + cambio de estado: el mismo patrón que upload y api_save_signature
+                    document = Document.objects.create(
+                        owner=owner,
+                        title=f'doc-{worker_id}-{i}',
+                        original_file=f'documents/original/doc-{worker_id}-{i}.pdf',
+                    )
+                    document.status = 'signed'
+                    document.save()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            list(executor.map(worker, range(self.THREADS)))
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            Document.objects.filter(owner=owner, status='signed').count(),
+            self.THREADS * self.WRITES,
+        )
+
+
+class IdempotencyTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+        self.factory = RequestFactory()
+        self.calls = 0
+
+    def request(self, body, key='clave-1'):
+        request = self.factory.post(
+            '/api/documents/1/rasterize/', json.dumps(body), content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+        request.user = self.user
+        return request
+
+    def view(self, status=200, error=None):
+        @idempotent
+        def counting_view(request):
+            self.calls += 1
+            if error:
+                raise error
+            return JsonResponse({'status': 'success', 'call': self.calls}, status=status)
+        return counting_view
+
+    def test_retry_replays_stored_response(self):
+        view = self.view()
+        first = view(self.request({'pages': [1]}))
+        retry = view(self.request({'pages': [1]}))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(json.loads(retry.content), json.loads(first.content))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_key_in_flight_returns_409(self):
+        record, replay = _claim_key(self.request({'pages': [1]}), 'clave-1')
+        self.assertIsNotNone(record)
+        self.assertIsNone(replay)
+
+        response = self.view()(self.request({'pages': [1]}))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertEqual(self.calls, 0)
+
+    def test_key_reused_with_other_request_returns_422(self):
+        view = self.view()
+        view(self.request({'pages': [1]}))
+        response = view(self.request({'pages': [2]}))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_key_is_released_when_view_raises(self):
+        with self.assertRaises(RuntimeError):
+            self.view(error=RuntimeError('fallo'))(self.request({'pages': [1]}))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.view()(self.request({'pages': [1]}))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+
+    def test_error_responses_are_not_stored(self):
+        self.view(status=503)(self.request({'pages': [1]}))
+        response = self.view()(self.request({'pages': [1]}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, 2)
+
+
+class DocumentOperationTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.document = Document.objects.create(
+            owner=owner, title='Contrato', original_file='documents/original/contrato.pdf',
+        )
+
+    def test_if_match_header_is_parsed(self):
+        factory = RequestFactory()
+        self.assertEqual(expected_version(factory.post('/', HTTP_IF_MATCH='"3"')), 3)
+        self.assertEqual(expected_version(factory.post('/', HTTP_IF_MATCH='4')), 4)
+        self.assertIsNone(expected_version(factory.post('/')))
+
+    def test_stale_if_match_is_a_conflict(self):
+        with self.assertRaises(DocumentConflict) as raised:
+            with document_operation(self.document, expected_version=self.document.version + 1):
+                pass
+        self.assertFalse(raised.exception.busy)
+        self.assertEqual(raised.exception.current_version, self.document.version)
+
+    def test_commit_bumps_version_and_stale_copy_conflicts(self):
+        stale = Document.objects.get(pk=self.document.pk)
+        with document_operation(self.document, expected_version=self.document.version):
+            commit_document(self.document, status='signed')
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.version, stale.version + 1)
+        self.assertIsNone(self.document.locked_until)
+        with self.assertRaises(DocumentConflict) as raised:
+            with document_operation(stale):
+                pass
+        self.assertEqual(raised.exception.current_version, self.document.version)
+
+    def test_concurrent_operation_is_busy(self):
+        other = Document.objects.get(pk=self.document.pk)
+        with document_operation(self.document):
+            with self.assertRaises(DocumentConflict) as raised:
+                with document_operation(other):
+                    pass
+        self.assertTrue(raised.exception.busy)
+
+        # Al salir sin guardar se libera la reserva
+        with document_operation(other):
+            pass
+
+
+class OptimizeStoredOutputTests(TemporaryMediaMixin, TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.document = Document(owner=owner, title='Contrato', status='flattened')
+        self.document.original_file.save('contrato.pdf', ContentFile(make_pdf()), save=False)
+        self.document.signed_file.save('contrato_flat.pdf', ContentFile(make_pdf()), save=False)
+        self.document.save()
+
+    def test_replacing_signed_file_keeps_version(self):
+        old_name, old_version = self.document.signed_file.name, self.document.version
+
+        optimize_stored_output(self.document.pk, old_name)
+
+        self.document.refresh_from_db()
+        self.assertNotEqual(self.document.signed_file.name, old_name)
+        self.assertEqual(self.document.version, old_version)
+
+    def test_skips_file_replaced_by_a_later_operation(self):
+        old_name = self.document.signed_file.name
+        self.document.signed_file.save('contrato_final.pdf', ContentFile(make_pdf()), save=True)
+        newer_name = self.document.signed_file.name
+        files_before = self.stored_files()
+
+        optimize_stored_output(self.document.pk, old_name)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.signed_file.name, newer_name)
+        self.assertEqual(self.stored_files(), files_before)
+
+
+# Con un solo worker la ventana es de 2 archivos: el límite se superaría tras escribir la primera ventana
+@override_settings(BACKGROUND_TASKS_EAGER=True, BATCH_UPLOAD_MAX_FILES=3, BATCH_UPLOAD_WORKERS=1)
+class BatchUploadTests(TemporaryMediaMixin, TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+
+    def make_zip(self, count):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for number in range(count):
+                archive.writestr(f'lote/doc_{number}.pdf', make_pdf(pages=1))
+        return SimpleUploadedFile('lote.zip', buffer.getvalue(), content_type='application/zip')
+
+    def test_batch_within_limit_creates_documents(self):
+        files = [self.make_zip(2), SimpleUploadedFile('suelto.pdf', make_pdf(pages=1))]
+
+        report = process_batch(files, self.owner)
+
+        self.assertEqual([entry['ok'] for entry in report], [True, True, True])
+        self.assertEqual(Document.objects.filter(owner=self.owner).count(), 3)
+
+    def test_batch_over_limit_writes_nothing(self):
+        files = [self.make_zip(3), SimpleUploadedFile('suelto.pdf', make_pdf(pages=1))]
+
+        with self.assertRaises(BatchUploadError):
+            process_batch(files, self.owner)
+
+        self.assertFalse(Document.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+@override_settings(SEARCH_MAX_RESULTS=2)
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+
+    def add_document(self, title, text=None, is_active=True):
+        document = Document.objects.create(
+            owner=self.owner, title=title, original_file=f'documents/original/{title}.pdf', is_active=is_active,
+        )
+        if text is not None:
+            DocumentContent.objects.create(document=document, title=title, text=text)
+        return document
+
+    def search(self, query):
+        queryset = Document.objects.filter(owner=self.owner, is_active=True)
+        return [document.title for document in search_documents(queryset, query, owner_id=self.owner.id)]
+
+    def test_deleted_documents_do_not_use_result_slots(self):
+        for number in range(3):
+            self.add_document(f'Contrato contrato {number}', 'contrato contrato contrato', is_active=False)
+        self.add_document('Anexo', 'cláusulas del contrato')
+
+        self.assertEqual(self.search('contrato'), ['Anexo'])
+
+    def test_documents_not_yet_indexed_are_found_by_title(self):
+        self.add_document('Contrato de obra', 'texto del contrato')
+        self.add_document('Contrato pendiente')
+
+        self.assertEqual(self.search('contrato'), ['Contrato de obra', 'Contrato pendiente'])
+        self.assertEqual(self.search('pendiente'), ['Contrato pendiente'])
+
+
+class FailingTransport:
+    def send(self, to_email, template_params):
+        raise TransportError('EmailJS HTTP Error 503')
+
+
+@override_settings(EMAIL_TRANSPORT='core.tests.FailingTransport', EMAIL_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+
+    def test_failed_message_drops_reset_link(self):
+        message = OutboundEmail.objects.create(
+            to_email='ana@example.com', template_params={'link': 'https://firma.example/reset/abc/token/'},
+        )
+
+        process_outbox(schedule_retry=False)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'pending')
+        self.assertIn('link', message.template_params)
+
+        OutboundEmail.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        process_outbox(schedule_retry=False)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'failed')
+        self.assertEqual(message.template_params, {})
+        self.assertIn('503', message.last_error)
+
+
+class _CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class RequestLoggingTests(TestCase):
+
+    def test_django_request_warning_keeps_request_id(self):
+        handler = _CollectingHandler()
+        handler.addFilter(RequestIdFilter())
+        django_request = logging.getLogger('django.request')
+        django_request.addHandler(handler)
+        try:
+            response = self.client.get('/no-existe/', HTTP_X_REQUEST_ID='abc123')
+        finally:
+            django_request.removeHandler(handler)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual([record.request_id for record in handler.records], ['abc123'])
+
+    def test_traceback_is_a_separate_json_field(self):
+        queue_handler = QueueListenerHandler([])
+        self.addCleanup(queue_handler.listener.stop)
+        self.addCleanup(atexit.unregister, queue_handler.listener.stop)
+        try:
+            raise ValueError('fallo')
+        except ValueError:
+            record = logging.getLogger('core').makeRecord(
+                'core', logging.ERROR, __file__, 1, 'Error procesando %s', ('doc',), sys.exc_info(),
+            )
+
+        payload = json.loads(JsonFormatter().format(queue_handler.prepare(record)))
+        self.assertEqual(payload['message'], 'Error procesando doc')
+        self.assertIn('ValueError: fallo', payload['exc_info'])
+
+
+@override_settings(MEMORY_PROFILING=True, BACKGROUND_TASKS_EAGER=True)
+class MemoryProfileTests(TransactionTestCase):
+
+    def test_single_operation_records_its_peak(self):
+        with profile_memory('solo'):
+            buffer = bytearray(4 * 1024 * 1024)
+            del buffer
+
+        profile = MemoryProfile.objects.get(operation='solo')
+        self.assertGreaterEqual(profile.tracemalloc_peak, 4 * 1024 * 1024)
+
+    def test_overlapping_operations_do_not_report_a_peak(self):
+        inside = threading.Barrier(2)
+
+        def operation(name):
+            with profile_memory(name):
+                inside.wait(timeout=5)
+                inside.wait(timeout=5)
+
+        threads = [threading.Thread(target=operation, args=(name,)) for name in ('a', 'b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        peaks = dict(MemoryProfile.objects.values_list('operation', 'tracemalloc_peak'))
+        self.assertEqual(peaks, {'a': None, 'b': None})
+
+
+@override_settings(
+    STORAGE_MAX_ATTEMPTS=3,
+    STORAGE_RETRY_BASE_SECONDS=0,
+    STORAGE_BREAKER_THRESHOLD=3,
+    STORAGE_BREAKER_RESET_SECONDS=0.1,
+    STORAGE_FAULT_LATENCY=0,
+    STORAGE_FAULT_RATE=0.5,
+)
+class ResilientStorageTests(SimpleTestCase):
+    """Reintentos y circuit breaker sobre FaultyFileSystemStorage con fallos deterministas."""
+
+    def setUp(self):
+        location = tempfile.mkdtemp(prefix='firma-storage-')
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.storage = resilient_storage.FaultyFileSystemStorage(location=location)
+        # Los circuitos son globales al proceso: cada test empieza con uno nuevo
+        resilient_storage._breakers.clear()
+        self.addCleanup(resilient_storage._breakers.clear)
+
+        # Cada llamada al backend consume un valor: < STORAGE_FAULT_RATE falla, >= pasa
+        self.rolls = []
+        patcher = mock.patch.object(resilient_storage, 'random')
+        fake_random = patcher.start()
+        self.addCleanup(patcher.stop)
+        fake_random.random.side_effect = lambda: self.rolls.pop(0) if self.rolls else 0.0
+        fake_random.choice.side_effect = lambda errors: errors[0]
+        fake_random.uniform.return_value = 0
+        self.backend_calls = fake_random.random
+
+    def script(self, *outcomes):
+        """Resultado de las próximas llamadas al backend: 'ok' o 'fail'."""
+        self.rolls = [0.9 if outcome == 'ok' else 0.1 for outcome in outcomes]
+
+    def test_transient_errors_are_retried(self):
+        self.script('fail', 'fail', 'ok')
+
+        self.assertFalse(self.storage.exists('documents/original/contrato.pdf'))
+        self.assertEqual(self.backend_calls.call_count, 3)
+        self.assertEqual(self.storage.breaker.state, 'closed')
+
+    def test_gives_up_after_max_attempts(self):
+        self.script('fail', 'fail', 'fail')
+
+        with self.assertRaises(resilient_storage.StorageUnavailable):
+            self.storage.exists('documents/original/contrato.pdf')
+        self.assertEqual(self.backend_calls.call_count, 3)
+
+    def test_writes_are_not_retried(self):
+        # save() consulta antes exists() (get_available_name); solo el guardado falla
+        self.script('ok', 'fail', 'ok')
+
+        with self.assertRaises(resilient_storage.StorageUnavailable):
+            self.storage.save('documents/original/contrato.pdf', ContentFile(b'%PDF-1.7'))
+        self.assertEqual(self.backend_calls.call_count, 2)
+
+    def test_missing_file_is_raised_without_retrying(self):
+        self.script('ok', 'ok', 'ok')
+
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open('documents/original/no-existe.pdf')
+        self.assertEqual(self.backend_calls.call_count, 1)
+        self.assertEqual(self.storage.breaker.state, 'closed')
+
+    def test_breaker_opens_after_threshold_and_fails_fast(self):
+        self.script('fail', 'fail', 'fail')
+        with self.assertRaises(resilient_storage.StorageUnavailable):
+            self.storage.exists('a.pdf')
+        self.assertEqual(self.storage.breaker.state, 'open')
+
+        # Con el circuito abierto no se llama al backend
+        with self.assertRaises(resilient_storage.StorageUnavailable):
+            self.storage.exists('a.pdf')
+        self.assertEqual(self.backend_calls.call_count, 3)
+
+    def test_breaker_half_opens_after_cooldown(self):
+        self.script('fail', 'fail', 'fail')
+        with self.assertRaises(resilient_storage.StorageUnavailable):
+            self.storage.exists('a.pdf')
+        time.sleep(0.15)
+        self.assertEqual(self.storage.breaker.state, 'half-open')
+
+        # La llamada de prueba falla: el circuito vuelve a abrirse sin más intentos
+        self.script('fail')
+        with self.assertRaises(resilient_storage.StorageUnavailable):
+            self.storage.exists('a.pdf')
+        self.assertEqual(self.storage.breaker.state, 'open')
+        self.assertEqual(self.backend_calls.call_count, 4)
+
+        # Tras otra espera la llamada de prueba funciona y el circuito se cierra
+        time.sleep(0.15)
+        self.script('ok')
+        self.assertFalse(self.storage.exists('a.pdf'))
+        self.assertEqual(self.storage.breaker.state, 'closed')
+
+
+class StorageOutageViewTests(TemporaryMediaMixin, TestCase):
+    """Las vistas de escritura dejan StorageUnavailable al middleware (503), no lo tragan."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='x')
+        self.client.force_login(self.user)
+        self.document = Document(owner=self.user, title='Contrato')
+        self.document.original_file.save('contrato.pdf', ContentFile(make_pdf(pages=1)), save=False)
+        self.document.save()
+
+    def assertUnavailable(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(settings.STORAGE_BREAKER_RESET_SECONDS))
+
+    def test_flatten_original_returns_503(self):
+        outage = resilient_storage.StorageUnavailable('almacenamiento caído')
+        with mock.patch('core.views.open_pdf', side_effect=outage):
+            response = self.client.post(f'/api/documents/{self.document.pk}/flatten_original/')
+
+        self.assertUnavailable(response)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'uploaded')
+
+    def test_delete_returns_503(self):
+        outage = resilient_storage.StorageUnavailable('almacenamiento caído')
+        with mock.patch('core.views.commit_document', side_effect=outage):
+            response = self.client.post(f'/api/documents/{self.document.pk}/delete/')
+
+        self.assertUnavailable(response)
+        self.assertTrue(Document.objects.get(pk=self.document.pk).is_active)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class PageOperationTests(TemporaryMediaMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='x')
+        self.client.force_login(self.user)
+        self.documents = []
+        for title in ('Contrato', 'Anexo'):
+            document = Document(owner=self.user, title=title)
+            document.original_file.save(f'{title.lower()}.pdf', ContentFile(make_pdf(pages=4)), save=False)
+            document.save()
+            self.documents.append(document)
+
+    def post(self, url, payload):
+        return self.client.post(url, json.dumps(payload), content_type='application/json')
+
+    def test_title_must_be_text(self):
+        document = self.documents[0]
+        response = self.post(f'/api/documents/{document.pk}/pages/extract/', {'ranges': '1-2', 'title': 123})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post('/api/documents/merge/', {'documents': [d.pk for d in self.documents], 'title': []})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PageOperation.objects.exists())
+
+    def test_split(self):
+        document = self.documents[0]
+        response = self.post(f'/api/documents/{document.pk}/pages/split/', {'ranges': '1-2, 3, 4'})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['operation_status'], 'done')
+        self.assertEqual(len(response.json()['documents']), 3)
+
+    def test_failed_split_discards_documents_already_created(self):
+        document = self.documents[0]
+        files_before = self.stored_files()
+
+        with mock.patch('core.page_operations.assemble_pdf', side_effect=self._fail_on_second_part()):
+            response = self.post(f'/api/documents/{document.pk}/pages/split/', {'ranges': '1, 2, 3'})
+
+        data = response.json()
+        self.assertEqual(data['operation_status'], 'failed')
+        self.assertNotIn('documents', data)
+        self.assertEqual(Document.objects.count(), 2)
+        self.assertEqual(self.stored_files(), files_before)
+
+    def test_failed_split_reports_documents_it_could_not_discard(self):
+        document = self.documents[0]
+
+        with mock.patch('core.page_operations.assemble_pdf', side_effect=self._fail_on_second_part()), \
+                mock.patch.object(Document, 'delete', side_effect=RuntimeError('almacenamiento caído')):
+            response = self.post(f'/api/documents/{document.pk}/pages/split/', {'ranges': '1, 2, 3'})
+
+        data = response.json()
+        self.assertEqual(data['operation_status'], 'failed')
+        self.assertEqual([d['title'] for d in data['documents']], ['Contrato (págs. 1)'])
+        self.assertEqual(PageOperation.objects.get().result_ids, [data['documents'][0]['id']])
+        leftover = Document.objects.get(pk=data['documents'][0]['id'])
+        self.assertTrue(leftover.original_file.storage.exists(leftover.original_file.name))
+
+    def test_abandoned_operation_is_resumed(self):
+        document = self.documents[0]
+        expired = timezone.now() - timedelta(seconds=settings.PAGE_OPERATION_TIMEOUT + 1)
+        abandoned = PageOperation.objects.create(
+            owner=self.user, kind='split', status='running', claimed_at=expired,
+            params={'documents': [document.pk], 'title': '', 'ranges': [[1, 2], [3, 4]], 'ranges_text': '1-2, 3-4'},
+        )
+        recent = PageOperation.objects.create(
+            owner=self.user, kind='split', status='running', claimed_at=timezone.now(), params=abandoned.params,
+        )
+
+        self.assertEqual(resume_stale_page_operations(), 1)
+
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, 'done')
+        self.assertEqual(len(abandoned.result_ids), 2)
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, 'running')
+
+    def test_superseded_worker_discards_its_documents(self):
+        document = self.documents[0]
+        files_before = self.stored_files()
+
+        def taken_over(parts):
+            # Otro worker retoma la operación mientras esta sigue trabajando
+            PageOperation.objects.update(claimed_at=timezone.now() + timedelta(seconds=1))
+            return assemble_pdf(parts)
+
+        with mock.patch('core.page_operations.assemble_pdf', side_effect=taken_over):
+            response = self.post(f'/api/documents/{document.pk}/pages/split/', {'ranges': '1, 2'})
+
+        self.assertEqual(response.json()['operation_status'], 'running')
+        self.assertEqual(Document.objects.count(), 2)
+        self.assertEqual(self.stored_files(), files_before)
+
+    @staticmethod
+    def _fail_on_second_part():
+        calls = []
+
+        def side_effect(parts):
+            calls.append(parts)
+            if len(calls) == 2:
+                raise RuntimeError('fallo al montar la parte')
+            return assemble_pdf(parts)
+        return side_effect
@@ -6,6 +6,7 @@ urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     # Agregaremos más rutas aquí
     path('document/upload/', views.upload_document, name='upload_document'),
+    path('document/upload/batch/', views.upload_documents_batch, name='upload_documents_batch'),
     path('signature/', views.manage_signature, name='manage_signature'),
     path('document/<int:pk>/sign/', views.sign_document_editor, name='sign_document_editor'),
 
@@ -15,7 +16,13 @@ urlpatterns = [
     path('api/documents/<int:pk>/delete/', views.delete_document, name='delete_document'),
     path('api/my-signature/', views.api_signature_proxy, name='api_signature_proxy'),
     path('api/document/<int:pk>/proxy/', views.api_document_proxy, name='api_document_proxy'),
+    path('api/document/<int:pk>/page/<int:page_number>/', views.api_document_page, name='api_document_page'),
     path('document/<int:pk>/download/', views.download_signed_document, name='download_signed_document'),
+    path('documents/export/', views.export_signed_documents, name='export_signed_documents'),
+    path('api/documents/<int:pk>/pages/extract/', views.api_page_operation, {'kind': 'extract'}, name='api_extract_pages'),
+    path('api/documents/<int:pk>/pages/split/', views.api_page_operation, {'kind': 'split'}, name='api_split_document'),
+    path('api/documents/merge/', views.api_merge_documents, name='api_merge_documents'),
+    path('api/page-operations/<int:pk>/', views.api_page_operation_status, name='api_page_operation_status'),
 
     path('redirect-after-login/', views.login_redirect_view, name='login_redirect'),
     
@@ -1,6 +1,6 @@
 import json
+import hashlib
 import fitz
-import tempfile
 import os
 import traceback
 import logging
@@ -9,17 +9,19 @@ import logging
 logger = logging.getLogger('core')
 
 import io
-from rembg import remove
 
 from PIL import Image
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.cache import caches
 from django.shortcuts import render, redirect , get_object_or_404 
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import views as auth_views
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from .forms import CustomPasswordResetForm
 
 class CustomPasswordResetView(auth_views.PasswordResetView):
@@ -38,50 +40,148 @@ class CustomPasswordResetCompleteView(auth_views.PasswordResetCompleteView):
     template_name = 'registration/password_reset_complete.html'
 
 # Asume que estos modelos ya tienen el campo 'status'
-from .models import Document, Signature 
-from .forms import DocumentForm, SignatureForm
+from .models import Document, Signature, PageOperation
+from .forms import DocumentForm, SignatureForm, BatchUploadForm
+from .batch_upload import process_batch, BatchUploadError
+from .pdf_utils import optimize_pdf, extract_pages, open_pdf
+from .background_removal import remove_background
+from .export import stream_signed_zip
+from .page_operations import start_page_operation
+from .search import search_documents, index_document
+from .storage import StorageUnavailable
+from .memory_profile import profile_memory
+from .mutations import (
+    DocumentConflict, commit_document, conflict_response, document_operation, expected_version, idempotent,
+)
+from .tasks import run_in_background, optimize_stored_output, normalize_document
 
 # --- Funciones auxiliares (fuela de las vistas) ---
-def rasterize_pdf(input_stream, output_stream, dpi=200):
+def rasterize_pdf(input_stream, output_stream, dpi=200, document_id=None):
     """
     Rasteriza un PDF convirtiendo cada página en una imagen y creando un nuevo PDF.
     
     Args:
-        input_stream: Objeto tipo archivo o bytes del PDF de entrada.
+        input_stream: FieldFile, objeto tipo archivo o bytes del PDF de entrada (ver open_pdf).
         output_stream: Objeto tipo archivo o stream para guardar el PDF rasterizado.
         dpi (int): Resolución de las imágenes (puntos por pulgada).
+        document_id (int): Documento de origen, solo para el perfilado de memoria.
     """
     try:
-        # Si input_stream es un objeto de archivo de Django, leemos sus bytes
-        if hasattr(input_stream, 'read'):
-            source_doc = fitz.open(stream=input_stream.read(), filetype="pdf")
+        with profile_memory('rasterize_pdf', document_id=document_id) as mem, \
+                open_pdf(input_stream, info=mem) as source_doc:
+            output_doc = fitz.open()
+            try:
+                for page in source_doc:
+                    pix = page.get_pixmap(dpi=dpi)
+                    new_page = output_doc.new_page(width=pix.width, height=pix.height)
+                    new_page.insert_image(new_page.rect, pixmap=pix)
+
+                # Guardamos en el stream de salida
+                pdf_bytes = output_doc.tobytes(garbage=4, deflate=True)
+                output_stream.write(pdf_bytes)
+            finally:
+                output_doc.close()
+        
+    except Exception as e:
+        logger.error(f"Error al rasterizar el PDF: {e}", exc_info=True)
+        raise
+
+def stamp_signature(pdf_doc, signature_img, placements):
+    """
+    Estampa la firma en una o varias posiciones del PDF.
+
+    El bitmap se incrusta una sola vez por rotación: la primera inserción
+    devuelve el xref de la imagen y las siguientes páginas lo referencian,
+    de modo que cada firma adicional solo añade unos bytes al archivo.
+    
+    Args:
+        pdf_doc: Documento fitz abierto sobre el que se estampa.
+        signature_img: Imagen PIL de la firma.
+        placements (list): Posiciones con x, y, width, rotation, page_number,
+            page_width y page_height en coordenadas del editor.
+    """
+    embedded = {}  # rotación -> (xref, relación de aspecto)
+
+    for placement in placements:
+        rotation = placement.get('rotation', 0)
+
+        if rotation in embedded:
+            xref, img_aspect_ratio = embedded[rotation]
         else:
-            source_doc = fitz.open(stream=input_stream, filetype="pdf")
+            # --- Lógica de rotación de la firma ---
+            rotated_img = signature_img.rotate(-rotation, expand=True, resample=Image.Resampling.BICUBIC)
             
-        output_doc = fitz.open()
+            # Obtener dimensiones reales de la imagen procesada (importante si expand=True cambió el tamaño)
+            actual_w, actual_h = rotated_img.size
+            img_aspect_ratio = actual_w / actual_h
+            png_buffer = io.BytesIO()
+            rotated_img.save(png_buffer, "PNG")
+            xref = 0
+
+        page = pdf_doc[placement['page_number'] - 1]
         
-        for page in source_doc:
-            pix = page.get_pixmap(dpi=dpi)
-            new_page = output_doc.new_page(width=pix.width, height=pix.height)
-            new_page.insert_image(new_page.rect, pixmap=pix)
-
-        # Guardamos en el stream de salida
-        pdf_bytes = output_doc.tobytes(garbage=4, deflate=True)
-        output_stream.write(pdf_bytes)
+        # Conversión de coordenadas
+        pdf_width = page.rect.width
+        pdf_height = page.rect.height
         
-        source_doc.close()
-        output_doc.close()
+        # Ratios para posicionamiento
+        x_ratio = pdf_width / placement['page_width']
+        y_ratio = pdf_height / placement['page_height']
         
-    except Exception as e:
-        logger.error(f"Error al rasterizar el PDF: {e}", exc_info=True)
+        x = placement['x'] * x_ratio
+        y = placement['y'] * y_ratio
+        
+        # Para las dimensiones (width/height), usamos x_ratio como escala base
+        # y recalculamos el alto según la proporción real de la imagen rotada.
+        # Esto evita que la firma se vea "estirada" o "aplastada".
+        width_in_pdf = placement['width'] * x_ratio
+        height_in_pdf = width_in_pdf / img_aspect_ratio
+        
+        signature_rect = fitz.Rect(x, y, x + width_in_pdf, y + height_in_pdf)
+        if xref:
+            # Reutiliza la imagen ya incrustada en el documento
+            page.insert_image(signature_rect, xref=xref)
+        else:
+            xref = page.insert_image(signature_rect, stream=png_buffer.getvalue())
+            embedded[rotation] = (xref, img_aspect_ratio)
+
+def save_pdf_output(document, filename, pdf_bytes, status):
+    """
+    Guarda el PDF resultante de una operación en signed_file y actualiza el estado.
+
+    Según PDF_OUTPUT_OPTIMIZATION[status] la salida se optimiza para vista web
+    rápida antes de guardarla ('inline'), después en segundo plano
+    ('background') o no se optimiza (None).
+
+    El guardado es condicional a la versión del documento (ver
+    core/mutations.py); si otra operación guardó antes se borra el archivo
+    recién subido y se lanza DocumentConflict.
+    """
+    mode = settings.PDF_OUTPUT_OPTIMIZATION.get(status)
+    if mode == 'inline':
+        pdf_bytes = optimize_pdf(pdf_bytes)
+
+    storage = document.signed_file.storage
+    name = storage.save(document.signed_file.field.generate_filename(document, filename), ContentFile(pdf_bytes))
+    try:
+        commit_document(document, signed_file=name, status=status)
+    except DocumentConflict:
+        storage.delete(name)
         raise
 
+    if mode == 'background':
+        run_in_background(optimize_stored_output, document.pk, document.signed_file.name)
+
 # --- Vistas principales ---
 @login_required
 def dashboard(request):
     user_documents = Document.objects.filter(owner=request.user, is_active=True).order_by('-created_at')
+    query = request.GET.get('q', '').strip()
+    if query:
+        user_documents = search_documents(user_documents, query, owner_id=request.user.id)
     context = {
-        'documents': user_documents
+        'documents': user_documents,
+        'query': query,
     }
     return render(request, 'core/dashboard.html', context)
 
@@ -94,6 +194,17 @@ def upload_document(request):
             document.owner = request.user
             document.status = 'uploaded' # Establece el estado inicial
             document.save()
+            # Copia de trabajo normalizada: en línea si el archivo es pequeño,
+            # en segundo plano si no (mientras tanto se opera sobre el original)
+            if document.original_file.size <= settings.PDF_NORMALIZE_INLINE_MAX_SIZE:
+                try:
+                    normalize_document(document.pk)
+                except Exception as e:
+                    logger.warning(f"No se pudo normalizar el documento {document.pk}: {e}")
+            else:
+                run_in_background(normalize_document, document.pk)
+            # Extrae el texto para la búsqueda sin retrasar la respuesta
+            run_in_background(index_document, document.pk)
             return redirect('dashboard')
     else:
         form = DocumentForm()
@@ -101,6 +212,29 @@ def upload_document(request):
     context = {'form': form}
     return render(request, 'core/upload_document.html', context)
 
+@login_required
+def upload_documents_batch(request):
+    """
+    Subida masiva: varios PDFs o un ZIP en un solo envío, con un informe por archivo.
+    """
+    report = None
+    if request.method == 'POST':
+        form = BatchUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                report = process_batch(form.cleaned_data['files'], request.user)
+            except BatchUploadError as e:
+                messages.error(request, str(e))
+            else:
+                created = sum(1 for item in report if item['ok'])
+                messages.success(request, f'{created} de {len(report)} documentos subidos correctamente.')
+                form = BatchUploadForm()
+    else:
+        form = BatchUploadForm()
+
+    context = {'form': form, 'report': report}
+    return render(request, 'core/upload_batch.html', context)
+
 @login_required
 def manage_signature(request):
     try:
@@ -119,8 +253,9 @@ def manage_signature(request):
                 # Abrir la imagen subida
                 input_image = Image.open(request.FILES['image'])
                 
-                # Remover fondo usando IA
-                output_image = remove(input_image)
+                # Remover fondo usando IA (rembg se carga en el primer uso)
+                with profile_memory('remove_background', file_size=request.FILES['image'].size):
+                    output_image = remove_background(input_image)
                 
                 # Guardar el resultado en un buffer de memoria como PNG
                 buffer = io.BytesIO()
@@ -165,11 +300,11 @@ def sign_document_editor(request, pk):
 
     num_pages = 0
     try:
-        # Usamos .open() y stream para compatibilidad con S3/MinIO
-        with document.original_file.open('rb') as f:
-            pdf_doc = fitz.open(stream=f.read(), filetype="pdf")
+        # open_pdf abre por ruta local o vuelca el objeto de S3/MinIO a disco
+        with open_pdf(document.pdf_source) as pdf_doc:
             num_pages = pdf_doc.page_count
-            pdf_doc.close()
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error al leer el PDF para firma: {e}")
         messages.error(request, 'El archivo PDF parece estar dañado o no se puede leer.')
@@ -190,85 +325,56 @@ def sign_document_editor(request, pk):
 
 @login_required
 @require_POST
+@idempotent
 def api_save_signature(request, pk):
     try:
         data = json.loads(request.body)
-        if data['page_width'] == 0 or data['page_height'] == 0:
-            return JsonResponse({'status': 'error', 'message': 'Las dimensiones de la página son cero.'}, status=400)
+        # Se admite una lista de posiciones (varias páginas) o una sola posición (formato anterior)
+        placements = data.get('placements') or [data]
+        for placement in placements:
+            if placement['page_width'] == 0 or placement['page_height'] == 0:
+                return JsonResponse({'status': 'error', 'message': 'Las dimensiones de la página son cero.'}, status=400)
 
         document = get_object_or_404(Document, pk=pk, owner=request.user)
         signature = get_object_or_404(Signature, user=request.user)
         
-        # --- Lógica de rotación de la firma ---
-        with signature.image.open('rb') as f:
-            img = Image.open(f)
-            rotated_img = img.rotate(-data['rotation'], expand=True, resample=Image.Resampling.BICUBIC)
-            
-            # Obtener dimensiones reales de la imagen procesada (importante si expand=True cambió el tamaño)
-            actual_w, actual_h = rotated_img.size
-            img_aspect_ratio = actual_w / actual_h
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as temp_img:
-                rotated_img.save(temp_img, "PNG")
-                temp_image_path = temp_img.name
-
-        # --- Lógica para insertar la firma en el PDF ---
-        # Abrir el documento original mediante stream
-        with document.original_file.open('rb') as f:
-            pdf_doc = fitz.open(stream=f.read(), filetype="pdf")
-            page_index = data['page_number'] - 1
-            page = pdf_doc[page_index]
-            
-            # Conversión de coordenadas
-            pdf_width = page.rect.width
-            pdf_height = page.rect.height
-            
-            # Ratios para posicionamiento
-            x_ratio = pdf_width / data['page_width']
-            y_ratio = pdf_height / data['page_height']
-            
-            x = data['x'] * x_ratio
-            y = data['y'] * y_ratio
-            
-            # Para las dimensiones (width/height), usamos x_ratio como escala base
-            # y recalculamos el alto según la proporción real de la imagen rotada.
-            # Esto evita que la firma se vea "estirada" o "aplastada".
-            width_in_pdf = data['width'] * x_ratio
-            height_in_pdf = width_in_pdf / img_aspect_ratio
-            
-            signature_rect = fitz.Rect(x, y, x + width_in_pdf, y + height_in_pdf)
-            page.insert_image(signature_rect, filename=temp_image_path)
-            
-            # Obtener los bytes del PDF modificado directamente desde la memoria
-            pdf_bytes = pdf_doc.tobytes(garbage=4, clean=True)
-            pdf_doc.close()
-        
-        # Limpiar el archivo de imagen temporal
-        if os.path.exists(temp_image_path):
-            os.remove(temp_image_path)
-        
-        # 1. Guardar los bytes del PDF en el modelo de Django
-        # Usamos .name para obtener el nombre base sin depender de .path
-        output_filename = os.path.basename(document.original_file.name).replace('.pdf', '_signed.pdf')
-        document.signed_file.save(output_filename, ContentFile(pdf_bytes), save=True)
+        with document_operation(document, expected_version(request)), \
+                profile_memory('api_save_signature', document_id=document.pk) as mem:
+            with signature.image.open('rb') as f:
+                signature_img = Image.open(f)
+                signature_img.load()
+
+            # --- Lógica para insertar la firma en el PDF ---
+            with open_pdf(document.pdf_source, info=mem) as pdf_doc:
+                stamp_signature(pdf_doc, signature_img, placements)
+                
+                # Obtener los bytes del PDF modificado directamente desde la memoria
+                pdf_bytes = pdf_doc.tobytes(garbage=4, clean=True)
         
-        # 2. Actualizar el estado del documento
-        document.status = 'signed'
-        document.save()
+            # Guardar los bytes del PDF en el modelo de Django y actualizar el estado
+            # Usamos .name para obtener el nombre base sin depender de .path
+            output_filename = os.path.basename(document.original_file.name).replace('.pdf', '_signed.pdf')
+            save_pdf_output(document, output_filename, pdf_bytes, 'signed')
         
         return JsonResponse({
             'status': 'success',
             'message': 'Firma aplicada correctamente.',
             'download_url': document.signed_file.url,
-            'document_status': document.status
+            'document_status': document.status,
+            'version': document.version,
         })
 
+    except DocumentConflict as e:
+        return conflict_response(e)
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"ERROR EN api_save_signature: {e}", exc_info=True)
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 @login_required
 @require_POST
+@idempotent
 def api_rasterize_document(request, pk):
     try:
         document = get_object_or_404(Document, pk=pk, owner=request.user)
@@ -283,25 +389,25 @@ def api_rasterize_document(request, pk):
         import io
         output_buffer = io.BytesIO()
         
-        # Llama a la función que hace el trabajo pesado pasandole el stream
-        with document.signed_file.open('rb') as f:
-            rasterize_pdf(f, output_buffer)
-        
-        # Guarda el nuevo archivo rasterizado en el modelo
-        output_buffer.seek(0)
-        document.signed_file.save(rasterized_filename, ContentFile(output_buffer.read()), save=True)
-            
-        # --- Actualizar el estado del documento a 'flattened' ---
-        document.status = 'flattened'
-        document.save()
+        with document_operation(document, expected_version(request)):
+            # Llama a la función que hace el trabajo pesado pasandole el stream
+            rasterize_pdf(document.signed_file, output_buffer, document_id=document.pk)
+
+            # Guarda el nuevo archivo rasterizado y actualiza el estado a 'flattened'
+            save_pdf_output(document, rasterized_filename, output_buffer.getvalue(), 'flattened')
             
         return JsonResponse({
             'status': 'success',
             'message': 'Documento rasterizado exitosamente.',
             'download_url': document.signed_file.url,
-            'document_status': document.status
+            'document_status': document.status,
+            'version': document.version,
         })
     
+    except DocumentConflict as e:
+        return conflict_response(e)
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"ERROR EN api_rasterize_document: {e}", exc_info=True)
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -310,6 +416,7 @@ def api_rasterize_document(request, pk):
 # --- Nueva vista para aplanar el PDF original ---
 @login_required
 @require_POST
+@idempotent
 def api_flatten_original(request, pk):
     try:
         document = get_object_or_404(Document, pk=pk, owner=request.user)
@@ -321,25 +428,25 @@ def api_flatten_original(request, pk):
         import io
         output_buffer = io.BytesIO()
         
-        # Llama a la función de rasterización usando streams
-        with document.original_file.open('rb') as f:
-            rasterize_pdf(f, output_buffer)
-        
-        # Guarda el nuevo archivo aplanado en el modelo
-        output_buffer.seek(0)
-        document.signed_file.save(output_filename, ContentFile(output_buffer.read()), save=True)
-            
-        # Actualiza el estado del documento
-        document.status = 'flattened_original'
-        document.save()
+        with document_operation(document, expected_version(request)):
+            # Llama a la función de rasterización usando streams
+            rasterize_pdf(document.pdf_source, output_buffer, document_id=document.pk)
+
+            # Guarda el nuevo archivo aplanado y actualiza el estado
+            save_pdf_output(document, output_filename, output_buffer.getvalue(), 'flattened_original')
             
         return JsonResponse({
             'status': 'success',
             'message': 'Documento original aplanado exitosamente.',
             'download_url': document.signed_file.url,
-            'document_status': document.status
+            'document_status': document.status,
+            'version': document.version,
         })
     
+    except DocumentConflict as e:
+        return conflict_response(e)
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"ERROR EN api_flatten_original: {e}", exc_info=True)
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -359,15 +466,129 @@ def download_signed_document(request, pk):
 
     try:
         filename = os.path.basename(document.signed_file.name)
-        with document.signed_file.open('rb') as f:
-            response = HttpResponse(f.read(), content_type='application/pdf')
+        with profile_memory('download_proxy', document_id=document.pk) as mem, document.signed_file.open('rb') as f:
+            content = f.read()
+            mem['file_size'] = len(content)
+            response = HttpResponse(content, content_type='application/pdf')
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
             return response
+    except StorageUnavailable:
+        # Lo convierte en 503 StorageUnavailableMiddleware; no es un 404
+        raise
     except Exception as e:
         logger.error(f"Error en proxy de descarga: {e}")
         raise Http404("Archivo no encontrado.")
 
 
+@login_required
+@require_POST
+def export_signed_documents(request):
+    """
+    Descarga en un único ZIP los archivos firmados de los documentos
+    seleccionados en el dashboard. El ZIP se genera mientras se envía.
+    """
+    try:
+        ids = {int(pk) for pk in request.POST.getlist('documents')}
+    except ValueError:
+        raise Http404("Selección no válida.")
+    if not ids:
+        messages.error(request, 'Selecciona al menos un documento firmado para exportar.')
+        return redirect('dashboard')
+    if len(ids) > settings.EXPORT_MAX_DOCUMENTS:
+        messages.error(request, f'Solo se pueden exportar {settings.EXPORT_MAX_DOCUMENTS} documentos a la vez.')
+        return redirect('dashboard')
+
+    documents = list(
+        Document.objects.filter(pk__in=ids, owner=request.user, is_active=True).order_by('-created_at')
+    )
+    # Igual que en las vistas de un solo documento: si alguno no es del usuario, 404
+    if len(documents) != len(ids):
+        raise Http404("Documento no encontrado.")
+    documents = [document for document in documents if document.signed_file]
+    if not documents:
+        messages.error(request, 'Ninguno de los documentos seleccionados está firmado.')
+        return redirect('dashboard')
+
+    logger.info(f"Exportación de {len(documents)} documentos firmados para {request.user.username}")
+    response = StreamingHttpResponse(stream_signed_zip(documents), content_type='application/zip')
+    filename = f"documentos_firmados_{timezone.localdate():%Y%m%d}.zip"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# --- Operaciones de páginas (se ejecutan en segundo plano) ---
+def _page_operation_response(operation):
+    operation.refresh_from_db()
+    data = {
+        'status': 'success' if operation.status != 'failed' else 'error',
+        'operation_id': operation.pk,
+        'operation_status': operation.status,
+        'status_url': reverse('api_page_operation_status', args=[operation.pk]),
+    }
+    if operation.status == 'failed':
+        data['message'] = operation.error
+    # En una operación fallida, result_ids son los documentos que no se pudieron deshacer
+    if operation.status == 'done' or operation.result_ids:
+        data['documents'] = list(
+            Document.objects.filter(pk__in=operation.result_ids).values('id', 'title')
+        )
+    return data
+
+
+@login_required
+@require_POST
+@idempotent
+def api_page_operation(request, pk, kind):
+    """Extrae páginas de un documento o lo divide en varios (kind: 'extract' o 'split')."""
+    document = get_object_or_404(Document, pk=pk, owner=request.user, is_active=True)
+    try:
+        data = json.loads(request.body or '{}')
+        operation = start_page_operation(
+            request.user, kind, [document], ranges_text=data.get('ranges', ''), title=data.get('title', ''),
+        )
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except AttributeError:
+        return JsonResponse({'status': 'error', 'message': 'Petición no válida.'}, status=400)
+    return JsonResponse(_page_operation_response(operation), status=202)
+
+
+@login_required
+@require_POST
+@idempotent
+def api_merge_documents(request):
+    """Une varios documentos, en el orden recibido, en uno nuevo."""
+    try:
+        data = json.loads(request.body or '{}')
+        ids = [int(pk) for pk in data.get('documents', [])]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'Selección no válida.'}, status=400)
+    if len(ids) < 2 or len(set(ids)) != len(ids):
+        return JsonResponse({'status': 'error', 'message': 'Selecciona al menos dos documentos distintos.'}, status=400)
+    if len(ids) > settings.PAGE_OPERATION_MAX_DOCUMENTS:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Solo se pueden unir {settings.PAGE_OPERATION_MAX_DOCUMENTS} documentos a la vez.',
+        }, status=400)
+
+    documents = Document.objects.in_bulk(ids)
+    documents = [documents.get(pk) for pk in ids]
+    if any(document is None or document.owner_id != request.user.id or not document.is_active for document in documents):
+        raise Http404("Documento no encontrado.")
+
+    try:
+        operation = start_page_operation(request.user, 'merge', documents, title=data.get('title', ''))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse(_page_operation_response(operation), status=202)
+
+
+@login_required
+def api_page_operation_status(request, pk):
+    operation = get_object_or_404(PageOperation, pk=pk, owner=request.user)
+    return JsonResponse(_page_operation_response(operation))
+
+
 @login_required
 def login_redirect_view(request):
     if request.user.is_staff:
@@ -378,13 +599,18 @@ def login_redirect_view(request):
 
 @login_required
 @require_POST
+@idempotent
 def delete_document(request, pk):
     try:
         document = get_object_or_404(Document, pk=pk, owner=request.user)
-        # Eliminación lógica (Soft Delete)
-        document.is_active = False
-        document.save()
+        # Eliminación lógica (Soft Delete); falla si hay una operación en curso
+        with document_operation(document, expected_version(request)):
+            commit_document(document, is_active=False, deleted_at=timezone.now())
         return JsonResponse({'status': 'success', 'message': 'Documento eliminado correctamente.'})
+    except DocumentConflict as e:
+        return conflict_response(e)
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error al eliminar documento: {e}")
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -397,8 +623,12 @@ def api_signature_proxy(request):
     """
     signature = get_object_or_404(Signature, user=request.user)
     try:
-        with signature.image.open('rb') as f:
-            return HttpResponse(f.read(), content_type="image/png")
+        with profile_memory('signature_proxy') as mem, signature.image.open('rb') as f:
+            content = f.read()
+            mem['file_size'] = len(content)
+            return HttpResponse(content, content_type="image/png")
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error en proxy de firma: {e}")
         raise Http404("Archivo de firma no encontrado")
@@ -410,8 +640,62 @@ def api_document_proxy(request, pk):
     """
     document = get_object_or_404(Document, pk=pk, owner=request.user)
     try:
-        with document.original_file.open('rb') as f:
-            return HttpResponse(f.read(), content_type="application/pdf")
+        with profile_memory('document_proxy', document_id=document.pk) as mem, document.original_file.open('rb') as f:
+            content = f.read()
+            mem['file_size'] = len(content)
+            return HttpResponse(content, content_type="application/pdf")
+    except StorageUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error en proxy de documento: {e}")
-        raise Http404("Archivo de documento no encontrado")
\ No newline at end of file
+        raise Http404("Archivo de documento no encontrado")
+
+
+def _page_cache_key(document, page_number):
+    # El original es inmutable y su nombre en el storage es único, así que
+    # identifica el contenido del documento.
+    document_hash = hashlib.sha1(document.original_file.name.encode('utf-8')).hexdigest()
+    return f"pdf-page:{document_hash}:{page_number}"
+
+
+@login_required
+def api_document_page(request, pk, page_number):
+    """
+    Sirve un PDF independiente con una sola página del documento original.
+
+    El editor pide las páginas bajo demanda en lugar del archivo completo.
+    En un fallo de caché se abre el original una vez y se extraen también
+    las páginas vecinas (PDF_PAGE_PREFETCH), que el editor pedirá después.
+    """
+    document = get_object_or_404(Document, pk=pk, owner=request.user)
+    cache = caches['pdf_pages']
+    cache_key = _page_cache_key(document, page_number)
+
+    page_bytes = cache.get(cache_key)
+    if page_bytes is None:
+        try:
+            with profile_memory('document_page', document_id=document.pk) as mem, \
+                    open_pdf(document.pdf_source, info=mem) as pdf_doc:
+                if not 1 <= page_number <= pdf_doc.page_count:
+                    raise Http404("Página fuera de rango")
+
+                prefetch = settings.PDF_PAGE_PREFETCH
+                first = max(1, page_number - prefetch)
+                last = min(pdf_doc.page_count, page_number + prefetch)
+                for number in range(first, last + 1):
+                    key = _page_cache_key(document, number)
+                    if number != page_number and cache.has_key(key):
+                        continue
+                    extracted = extract_pages(pdf_doc, number - 1)
+                    cache.set(key, extracted)
+                    if number == page_number:
+                        page_bytes = extracted
+        except (Http404, StorageUnavailable):
+            raise
+        except Exception as e:
+            logger.error(f"Error extrayendo la página {page_number} del documento {pk}: {e}")
+            raise Http404("Página no disponible")
+
+    response = HttpResponse(page_bytes, content_type="application/pdf")
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .database import get_database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -62,6 +64,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -70,6 +73,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.StorageUnavailableMiddleware',
 ]
 
 ROOT_URLCONF = 'firma_project.urls'
@@ -95,13 +99,9 @@ WSGI_APPLICATION = 'firma_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-        'timeout': 20,  # Aumenta el tiempo de espera a 20 segundos
-    }
-}
+# SQLite (WAL) por defecto; DB_ENGINE=postgres para PostgreSQL.
+# Ver firma_project/database.py para las variables de entorno disponibles.
+DATABASES = get_database_config(BASE_DIR)
 
 
 # Password validation
@@ -201,11 +201,12 @@ AWS_S3_SIGNATURE_VERSION = "s3v4"
 AWS_QUERYSTRING_AUTH = False
 AWS_S3_CUSTOM_DOMAIN = os.getenv('MINIO_PUBLIC_URL')
 AWS_S3_URL_PROTOCOL = 'https:'
+AWS_S3_MAX_MEMORY_SIZE = int(os.getenv('AWS_S3_MAX_MEMORY_SIZE', 5 * 1024 * 1024))
 
 # Configuración de STORAGES (Django 4.2+)
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3.S3Storage",
+        "BACKEND": "core.storage.ResilientS3Storage",
         "OPTIONS": {
             "access_key": AWS_ACCESS_KEY_ID,
             "secret_key": AWS_SECRET_ACCESS_KEY,
@@ -220,6 +221,8 @@ STORAGES = {
             "verify": AWS_S3_VERIFY,
             "custom_domain": AWS_S3_CUSTOM_DOMAIN,
             "url_protocol": AWS_S3_URL_PROTOCOL,
+            # Las descargas mayores se vuelcan a disco en lugar de quedarse en memoria
+            "max_memory_size": AWS_S3_MAX_MEMORY_SIZE,
         },
     },
     "staticfiles": {
@@ -227,45 +230,196 @@ STORAGES = {
     },
 }
 
+# STORAGE_BACKEND=local guarda los archivos en MEDIA_ROOT en lugar de MinIO
+# (desarrollo y pruebas de carga sin depender del bucket); STORAGE_BACKEND=faulty
+# hace lo mismo pero inyectando latencia y errores (core/storage.py).
+if os.getenv('STORAGE_BACKEND', 's3') == 'local':
+    STORAGES['default'] = {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    }
+elif os.getenv('STORAGE_BACKEND', 's3') == 'faulty':
+    STORAGES['default'] = {
+        "BACKEND": "core.storage.FaultyFileSystemStorage",
+    }
+
+# Resiliencia del storage (core/storage.py): timeouts, reintentos de lecturas
+# y circuit breaker, para que un MinIO lento no agote el timeout de gunicorn.
+STORAGE_CONNECT_TIMEOUT = float(os.getenv('STORAGE_CONNECT_TIMEOUT', '3'))
+STORAGE_READ_TIMEOUT = float(os.getenv('STORAGE_READ_TIMEOUT', '15'))
+STORAGE_MAX_ATTEMPTS = int(os.getenv('STORAGE_MAX_ATTEMPTS', '3'))
+STORAGE_RETRY_BASE_SECONDS = float(os.getenv('STORAGE_RETRY_BASE_SECONDS', '0.2'))
+STORAGE_BREAKER_THRESHOLD = int(os.getenv('STORAGE_BREAKER_THRESHOLD', '5'))
+STORAGE_BREAKER_RESET_SECONDS = int(os.getenv('STORAGE_BREAKER_RESET_SECONDS', '30'))
+# Solo con STORAGE_BACKEND=faulty: segundos de latencia y probabilidad de fallo por operación
+STORAGE_FAULT_LATENCY = float(os.getenv('STORAGE_FAULT_LATENCY', '0'))
+STORAGE_FAULT_RATE = float(os.getenv('STORAGE_FAULT_RATE', '0.2'))
+
+# --- Caché ---
+# 'pdf_pages' guarda en disco las páginas extraídas para el editor; al ser
+# file-based la comparten todos los workers de gunicorn del contenedor.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pdf_pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('PDF_PAGE_CACHE_DIR', str(BASE_DIR / 'cache' / 'pdf_pages')),
+        'TIMEOUT': int(os.getenv('PDF_PAGE_CACHE_TIMEOUT', str(60 * 60 * 24))),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('PDF_PAGE_CACHE_MAX_ENTRIES', '5000'))},
+    },
+}
+# Directorio donde core.pdf_utils.open_pdf vuelca los PDF remotos para abrirlos
+# por ruta (None = directorio temporal del sistema).
+PDF_SPOOL_DIR = os.getenv('PDF_SPOOL_DIR') or None
+# Páginas vecinas que se extraen junto con la pedida en un fallo de caché
+PDF_PAGE_PREFETCH = int(os.getenv('PDF_PAGE_PREFETCH', '1'))
+
+# --- Trabajos en segundo plano y optimización de PDFs ---
+# Hilos por worker de gunicorn para trabajos que no bloquean la respuesta (core/tasks.py)
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', '2'))
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False') == 'True'
+
+# Al subir un PDF se guarda una copia de trabajo reparada y recomprimida
+# (core/tasks.py normalize_document); hasta este tamaño se hace en la propia
+# petición, por encima en segundo plano.
+PDF_NORMALIZE_INLINE_MAX_SIZE = int(os.getenv('PDF_NORMALIZE_INLINE_MAX_SIZE', 2 * 1024 * 1024))
+
+# Optimización "vista web rápida" (linealización + object streams) por operación,
+# indexada por el estado resultante: 'inline', 'background' o None para desactivarla.
+PDF_OUTPUT_OPTIMIZATION = {
+    'signed': os.getenv('PDF_OPTIMIZE_SIGNED', 'inline') or None,
+    'flattened': os.getenv('PDF_OPTIMIZE_FLATTENED', 'background') or None,
+    'flattened_original': os.getenv('PDF_OPTIMIZE_FLATTENED', 'background') or None,
+}
+
+# --- Eliminación del fondo de las firmas (core/background_removal.py) ---
+# model: modelo de rembg o None para usar solo el umbral; max_side: lado máximo
+# de la imagen con la que se hace la inferencia (la máscara se reescala);
+# scan_threshold: usar el umbral si la imagen parece un escaneo limpio.
+# Comparar perfiles: python manage.py bench_background_removal
+BACKGROUND_REMOVAL_PROFILES = {
+    'quality': {'model': 'u2net', 'max_side': None, 'scan_threshold': False},
+    'balanced': {'model': 'u2netp', 'max_side': 1024, 'scan_threshold': True},
+    'fast': {'model': 'silueta', 'max_side': 640, 'scan_threshold': True},
+    'threshold': {'model': None, 'max_side': None, 'scan_threshold': True},
+}
+BACKGROUND_REMOVAL_PROFILE = os.getenv('BACKGROUND_REMOVAL_PROFILE', 'balanced')
+
+# --- Notificaciones salientes (core/notifications.py) ---
+# 'core.notifications.StubTransport' para desarrollo, tests y pruebas de carga
+EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', 'core.notifications.EmailJSTransport')
+EMAIL_CONNECT_TIMEOUT = float(os.getenv('EMAIL_CONNECT_TIMEOUT', '5'))
+EMAIL_READ_TIMEOUT = float(os.getenv('EMAIL_READ_TIMEOUT', '10'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_RETRY_BASE_SECONDS', '30'))
+EMAIL_RETRY_MAX_SECONDS = int(os.getenv('EMAIL_RETRY_MAX_SECONDS', '1800'))
+
+# --- Subida masiva (core/batch_upload.py) ---
+BATCH_UPLOAD_MAX_FILES = int(os.getenv('BATCH_UPLOAD_MAX_FILES', '500'))
+BATCH_UPLOAD_MAX_FILE_SIZE = int(os.getenv('BATCH_UPLOAD_MAX_FILE_SIZE', str(50 * 1024 * 1024)))  # 50 MB
+# Hilos que validan y suben PDFs en paralelo dentro de una petición
+BATCH_UPLOAD_WORKERS = int(os.getenv('BATCH_UPLOAD_WORKERS', '4'))
+# Django limita por defecto a 100 los archivos de un formulario multipart
+DATA_UPLOAD_MAX_NUMBER_FILES = BATCH_UPLOAD_MAX_FILES
+
+# --- Exportación en ZIP (core/export.py) ---
+EXPORT_MAX_DOCUMENTS = int(os.getenv('EXPORT_MAX_DOCUMENTS', '500'))
+# Documentos que se leen del storage en paralelo mientras se escribe el ZIP
+EXPORT_PREFETCH = int(os.getenv('EXPORT_PREFETCH', '4'))
+
+# --- Operaciones de páginas (core/page_operations.py) ---
+PAGE_OPERATION_MAX_DOCUMENTS = int(os.getenv('PAGE_OPERATION_MAX_DOCUMENTS', '50'))
+# Segundos tras los que una operación sin terminar se da por abandonada
+# (worker reiniciado) y run_page_operations puede retomarla.
+PAGE_OPERATION_TIMEOUT = int(os.getenv('PAGE_OPERATION_TIMEOUT', '600'))
+
+# --- Búsqueda de texto completo (core/search.py) ---
+SEARCH_MAX_TEXT_CHARS = int(os.getenv('SEARCH_MAX_TEXT_CHARS', '1000000'))
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '500'))
+
+# --- Operaciones sobre documentos (core/mutations.py) ---
+# Tiempo máximo que una operación (firmar, aplanar) retiene el documento;
+# pasado este plazo se considera abandonada y otra petición puede tomarlo.
+DOCUMENT_OPERATION_TIMEOUT = int(os.getenv('DOCUMENT_OPERATION_TIMEOUT', 300))
+# Horas durante las que se recuerda la respuesta de una Idempotency-Key
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+# --- Perfilado de memoria (core/memory_profile.py, comando memory_report) ---
+# Activo solo para diagnosticar OOM: tracemalloc ralentiza las operaciones medidas.
+MEMORY_PROFILING = os.getenv('MEMORY_PROFILING', 'False') == 'True'
+
+# --- Retención del almacenamiento (python manage.py gc_storage) ---
+# Días que se conservan los archivos de documentos eliminados lógicamente
+SOFT_DELETE_RETENTION_DAYS = int(os.getenv('SOFT_DELETE_RETENTION_DAYS', '30'))
+# Antigüedad mínima de un objeto sin referencias antes de borrarlo (subidas en curso)
+STORAGE_GC_GRACE_HOURS = int(os.getenv('STORAGE_GC_GRACE_HOURS', '24'))
+
 WHITENOISE_MANIFEST_STRICT = False # Evita error 500 si falta una entrada en el manifest
 
 # --- Configuración de Logging ---
+# Los hilos de la app solo encolan registros (core.log.QueueListenerHandler) y un
+# listener por proceso los escribe. Variables de entorno:
+# - LOG_OUTPUT: 'file' (consola + archivo) o 'stdout' (solo consola, recomendado en Docker)
+# - LOG_FORMAT: 'json' o 'text'
+# - LOG_INFO_SAMPLE_RATE: fracción de los INFO de django y de peticiones que se conserva
+LOG_OUTPUT = os.getenv('LOG_OUTPUT', 'file')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_INFO_SAMPLE_RATE = float(os.getenv('LOG_INFO_SAMPLE_RATE', '1.0'))
+
+_log_handlers = {
+    'console': {
+        'level': 'INFO',
+        'class': 'logging.StreamHandler',
+        'formatter': LOG_FORMAT,
+    },
+}
+if LOG_OUTPUT == 'file':
+    # WatchedFileHandler es seguro con varios workers escribiendo el mismo archivo:
+    # ninguno rota por su cuenta, la rotación la hace logrotate (copytruncate o
+    # create) y el handler reabre el archivo cuando cambia.
+    _log_handlers['file'] = {
+        'level': 'INFO',
+        'class': 'logging.handlers.WatchedFileHandler',
+        'filename': os.path.join(BASE_DIR, 'logs/django.log'),
+        'formatter': LOG_FORMAT,
+    }
+_log_handlers['queue'] = {
+    '()': 'core.log.QueueListenerHandler',
+    'handlers': [f'cfg://handlers.{name}' for name in _log_handlers],
+    'filters': ['request_id', 'sampling'],
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+    'filters': {
+        'request_id': {
+            '()': 'core.log.RequestIdFilter',
         },
-        'simple': {
-            'format': '{levelname} {asctime} {message}',
-            'style': '{',
+        'sampling': {
+            '()': 'core.log.SamplingFilter',
+            'rate': LOG_INFO_SAMPLE_RATE,
+            'loggers': ['django', 'core.request'],
         },
     },
-    'handlers': {
-        'console': {
-            'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+    'formatters': {
+        'json': {
+            '()': 'core.log.JsonFormatter',
         },
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': os.path.join(BASE_DIR, 'logs/django.log'),
-            'maxBytes': 1024 * 1024 * 5,  # 5 MB
-            'backupCount': 5,
-            'formatter': 'verbose',
+        'text': {
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} [{request_id}] {message}',
+            'style': '{',
         },
     },
+    'handlers': _log_handlers,
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': True,
         },
         'core': {  # Logger específico para tu aplicación
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },